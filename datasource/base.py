@@ -1,9 +1,35 @@
 from abc import ABC, abstractmethod
 from datetime import date
+from typing import Iterator
 import polars as pl
+import pyarrow as pa
 
 
 class DataSource(ABC):
     @abstractmethod
     def load(self, symbol: str, trading_date: date) -> pl.DataFrame:
         """Return a Polars DataFrame for the given symbol on the given date."""
+
+    @abstractmethod
+    def load_timeframe(self, symbol: str, time_frame: str, start: date | None = None, end: date | None = None) -> pl.DataFrame:
+        """Return the coarse bars (ONE_HOUR / ONE_DAY) stored for `symbol` within [start, end], sorted by `t`."""
+
+    @abstractmethod
+    def trading_dates(self, symbol: str, start: date | None = None, end: date | None = None) -> list[date]:
+        """Return the sorted dates stored for `symbol` within [start, end]."""
+
+    @abstractmethod
+    def iter_batches(
+        self, symbols: list[str], start: date | None = None, end: date | None = None, batch_rows: int = 16_384
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Stream the stored rows of `symbols` over [start, end] as record batches of `batch_rows` rows
+        (the last one shorter), date by date, without materializing the range.
+        """
+
+    def fingerprint(self, symbol: str, trading_date: date) -> str | None:
+        """
+        Cheap identity of the stored partition, changing whenever its content may have changed.
+        None means the source cannot tell without loading the data.
+        """
+        return None
@@ -1,6 +1,8 @@
 from functools import lru_cache
 from datetime import date
+from typing import Iterator
 import polars as pl
+import pyarrow as pa
 from datasource.base import DataSource
 
 
@@ -9,5 +11,26 @@ class CachedSource(DataSource):
         self._wrapped = wrapped
 
     @lru_cache(maxsize=32)
-    def load(self, symbol: str, trading_date: date) -> pl.DataFrame:
+    def _load(self, symbol: str, trading_date: date, fingerprint: str | None) -> pl.DataFrame:
         return self._wrapped.load(symbol, trading_date)
+
+    def load(self, symbol: str, trading_date: date) -> pl.DataFrame:
+        # the fingerprint is part of the key, so a partition rewritten by the 5-minute job is reloaded
+        return self._load(symbol, trading_date, self._wrapped.fingerprint(symbol, trading_date))
+
+    # listings and fingerprints must always reflect the files on disk, so they are never cached;
+    # streamed scans are far larger than the cache and would only evict the working set; coarse bars
+    # are one small file per year with no fingerprint to key on
+    def load_timeframe(self, symbol: str, time_frame: str, start: date | None = None, end: date | None = None) -> pl.DataFrame:
+        return self._wrapped.load_timeframe(symbol, time_frame, start, end)
+
+    def trading_dates(self, symbol: str, start: date | None = None, end: date | None = None) -> list[date]:
+        return self._wrapped.trading_dates(symbol, start, end)
+
+    def fingerprint(self, symbol: str, trading_date: date) -> str | None:
+        return self._wrapped.fingerprint(symbol, trading_date)
+
+    def iter_batches(
+        self, symbols: list[str], start: date | None = None, end: date | None = None, batch_rows: int = 16_384
+    ) -> Iterator[pa.RecordBatch]:
+        return self._wrapped.iter_batches(symbols, start, end, batch_rows)
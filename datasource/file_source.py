@@ -1,21 +1,118 @@
-from datetime import date
+import hashlib
+import logging
+import os
+from datetime import date, datetime
+from glob import glob
+from typing import Iterator
 import polars as pl
+import pyarrow as pa
 from datasource.base import DataSource
+from datasource.storage_profile import iter_storage_batches, read_storage
 from utils.timing import timeit_ns
 
+logger = logging.getLogger(__name__)
+
 
 class ParquetSource(DataSource):
     def __init__(self, root_path: str = "./data"):
         self.root = root_path
+        self._folders: dict[str, tuple[int, list[str]]] = {}
 
-    # noinspection PyArgumentList
     @timeit_ns
     def load(self, symbol: str, trading_date: date) -> pl.DataFrame:
-        path = f"{self.root}/{symbol}/**/stock_date={trading_date:%Y-%m-%d}/*.parquet"
-        print("loading path:", path)
-        df = pl.read_parquet(
-            path,
-            allow_missing_columns=True,
-            hive_partitioning=True,
-        )
-        return df.with_columns(pl.col("stock_date").cast(pl.Date)).sort("t")
+        files = self.partition_files(symbol, trading_date)
+        if not files:
+            raise FileNotFoundError(f"{self.root}/{symbol}/**/stock_date={trading_date:%Y-%m-%d}/*.parquet")
+        logger.debug("loading %s", files)
+        # file by file, so partitions written under different storage profiles still line up
+        df = pl.concat([read_storage(f) for f in files], how="diagonal_relaxed")
+        return df.with_columns(pl.lit(trading_date, dtype=pl.Date).alias("stock_date")).sort("t")
+
+    def _contract_folders(self, symbol: str) -> list[str]:
+        """
+        Sub-folders of a symbol that are not partitions themselves (data/VN30F/<contract>).
+        Re-listed only when the symbol folder's mtime changes, i.e. when an entry is added or removed.
+        """
+        base = f"{self.root}/{symbol}"
+        mtime = os.stat(base).st_mtime_ns
+        cached = self._folders.get(base)
+        if cached is None or cached[0] != mtime:
+            cached = self._folders[base] = (
+                mtime,
+                [e.path for e in os.scandir(base) if e.is_dir() and not e.name.startswith(("stock_date=", "."))],
+            )
+        return cached[1]
+
+    def partition_files(self, symbol: str, trading_date: date) -> list[str]:
+        """Parquet files making up one partition (several contract folders may hold the same date)."""
+        partition = f"stock_date={trading_date:%Y-%m-%d}"
+        try:
+            folders = [f"{self.root}/{symbol}"] + self._contract_folders(symbol)
+        except FileNotFoundError:
+            return []
+        files = []
+        for folder in folders:
+            if os.path.isdir(f"{folder}/{partition}"):
+                files += [f"{folder}/{partition}/{f}" for f in os.listdir(f"{folder}/{partition}") if f.endswith(".parquet")]
+        return sorted(files)
+
+    def trading_dates(self, symbol: str, start: date | None = None, end: date | None = None) -> list[date]:
+        dates = set()
+        for folder in glob(f"{self.root}/{symbol}/stock_date=*") + glob(f"{self.root}/{symbol}/*/stock_date=*"):
+            d = datetime.strptime(os.path.basename(folder).removeprefix("stock_date="), "%Y-%m-%d").date()
+            if (start is None or d >= start) and (end is None or d <= end):
+                dates.add(d)
+        return sorted(dates)
+
+    def iter_batches(
+        self, symbols: list[str], start: date | None = None, end: date | None = None, batch_rows: int = 16_384
+    ) -> Iterator[pa.RecordBatch]:
+        """
+        Record batches in `CANONICAL_SCHEMA`, ordered by date then by position in `symbols`
+        (file order within a partition). Holds at most ~2 x `batch_rows` rows at a time.
+        """
+        partitions = sorted((d, i) for i, symbol in enumerate(symbols) for d in self.trading_dates(symbol, start, end))
+        pending, rows = [], 0
+        for d, i in partitions:
+            for f in self.partition_files(symbols[i], d):
+                for batch in iter_storage_batches(f, d, batch_rows):
+                    pending.append(batch)
+                    rows += batch.num_rows
+                    if rows >= batch_rows:
+                        # partitions are a few hundred rows: glue them into full batches
+                        table = pa.Table.from_batches(pending).combine_chunks()
+                        full = rows - rows % batch_rows
+                        yield from table.slice(0, full).to_batches(max_chunksize=batch_rows)
+                        pending, rows = table.slice(full).to_batches(), rows - full
+        if rows:
+            yield from pa.Table.from_batches(pending).combine_chunks().to_batches()
+
+    def load_timeframe(self, symbol: str, time_frame: str, start: date | None = None, end: date | None = None) -> pl.DataFrame:
+        """
+        Coarse bars (ONE_HOUR / ONE_DAY) from `<root>/timeframe=<TF>/<symbol>/year=YYYY`, contract folders
+        included (`timeframe=<TF>/VN30F/<contract>/year=YYYY`, each holding its front-month period).
+        """
+        base = f"{self.root}/timeframe={time_frame}/{symbol}"
+        files = sorted(glob(f"{base}/year=*/*.parquet") + glob(f"{base}/*/year=*/*.parquet"))
+        if start is not None or end is not None:
+            lo, hi = (start or date.min).year, (end or date.max).year
+            files = [f for f in files if lo <= int(f.split("year=")[1].split("/")[0]) <= hi]
+        if not files:
+            raise FileNotFoundError(base)
+        df = pl.concat([read_storage(f) for f in files], how="diagonal_relaxed").sort("t")
+        if start is not None:
+            df = df.filter(pl.col("t").dt.date() >= start)
+        if end is not None:
+            df = df.filter(pl.col("t").dt.date() <= end)
+        return df
+
+    def fingerprint(self, symbol: str, trading_date: date) -> str | None:
+        """Hash of (path, size, mtime) of the partition files; no parquet decoding involved."""
+        files = self.partition_files(symbol, trading_date)
+        if not files:
+            return None
+        h = hashlib.sha1()
+        for f in files:
+            st = os.stat(f)
+            h.update(f"{os.path.relpath(f, self.root)}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+        return h.hexdigest()[:16]
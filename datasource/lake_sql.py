@@ -0,0 +1,160 @@
+"""
+SQL over the Parquet lake, with Polars SQL.
+
+Every symbol folder under the root becomes a view named after it in lower case
+(`vn30`, `vn30f`), and `bars` is all of them stacked. A view is a lazy scan of
+`<symbol>/stock_date=*` and `<symbol>/<contract>/stock_date=*`. `stock_date`
+is the hive partition key, so `WHERE stock_date ...` prunes whole files
+before anything is read. Prices are float64 whatever storage profile a file
+was written under, and timestamps are the naive Asia/Ho_Chi_Minh wall clock
+(as in `datasource.panel`), so `t::time = '14:30:00'` means 14:30 in Hanoi.
+`snapshot_dttm` is download bookkeeping and is left out.
+
+Views are prepared once and reused across queries until a partition is
+added or replaced underneath them.
+
+    python datasource/lake_sql.py query --root data "
+        SELECT f.symbol, avg(f.c - i.c) AS basis
+        FROM vn30f f JOIN vn30 i ON f.t = i.t
+        WHERE f.stock_date >= DATE '2025-01-01' AND f.t::time = '14:30:00'
+        GROUP BY f.symbol ORDER BY f.symbol"
+
+Compare dates with `DATE '...'` literals: Polars SQL does not coerce a plain
+string against a date column on the right side of a join.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from glob import glob
+
+import click
+import polars as pl
+import pyarrow.parquet as pq
+
+from datasource.storage_profile import CANONICAL_SCHEMA
+
+__all__ = ["LakeSQL"]
+
+# canonical columns minus snapshot_dttm and the hive key, with wall-clock timestamps
+VIEW_SCHEMA = {
+    name: pl.Datetime("ns") if isinstance(dtype, pl.Datetime) else dtype
+    for name, dtype in pl.from_arrow(CANONICAL_SCHEMA.empty_table()).schema.items()
+    if name not in ("snapshot_dttm", "stock_date")
+}
+LOCAL_TZ = "Asia/Ho_Chi_Minh"
+
+
+def _normalize(name: str, file_dtype: pl.DataType | None, dtype: pl.DataType) -> pl.Expr:
+    if file_dtype is None:
+        return pl.lit(None, dtype=dtype).alias(name)
+    col = pl.col(name)
+    if isinstance(dtype, pl.Datetime):
+        if not getattr(file_dtype, "time_zone", None):
+            col = col.dt.replace_time_zone("UTC")
+        return col.dt.convert_time_zone(LOCAL_TZ).dt.replace_time_zone(None).dt.cast_time_unit(dtype.time_unit)
+    # Decimal ticks -> Float64 is exact in Polars (Arrow's cast is not)
+    return col.cast(dtype)
+
+
+class LakeSQL:
+    def __init__(self, root_path: str = "../data"):
+        self.root = root_path
+        self._schemas: dict[str, tuple[int, tuple]] = {}            # file -> (mtime, parquet schema)
+        self._views: dict[str, tuple[tuple, pl.LazyFrame]] = {}     # view -> (folder mtimes, frame)
+
+    # --- discovery -----------------------------------------------------------
+    def symbols(self) -> list[str]:
+        """Symbol folders under the root; `timeframe=` (coarse bars) and hidden folders are not minute data."""
+        return sorted(
+            e.name for e in os.scandir(self.root)
+            if e.is_dir() and not e.name.startswith((".", "timeframe="))
+        )
+
+    def _folders(self, symbol: str) -> list[str]:
+        base = f"{self.root}/{symbol}"
+        return [base] + sorted(e.path for e in os.scandir(base) if e.is_dir() and not e.name.startswith(("stock_date=", ".")))
+
+    def _file_schema(self, path: str) -> tuple:
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._schemas.get(path)
+        if cached is None or cached[0] != mtime:
+            schema = pl.from_arrow(pq.read_schema(path).empty_table()).schema
+            cached = self._schemas[path] = (mtime, tuple(schema.items()))
+        return cached[1]
+
+    # --- views ---------------------------------------------------------------
+    def _scan(self, symbol: str) -> pl.LazyFrame:
+        files = sorted(
+            f for folder in self._folders(symbol) for f in glob(f"{folder}/stock_date=*/*.parquet")
+        )
+        # one scan per file layout: a multi-file scan needs a single physical schema
+        groups: dict[tuple, list[str]] = {}
+        for f in files:
+            groups.setdefault(self._file_schema(f), []).append(f)
+
+        frames = []
+        for layout, group in groups.items():
+            file_schema = dict(layout)
+            scan = pl.scan_parquet(group, hive_partitioning=True, hive_schema={"stock_date": pl.Date})
+            frames.append(scan.select(
+                *[_normalize(name, file_schema.get(name), dtype) for name, dtype in VIEW_SCHEMA.items()],
+                pl.col("stock_date"),
+            ))
+        if not frames:
+            return pl.LazyFrame(schema={**VIEW_SCHEMA, "stock_date": pl.Date})
+        return pl.concat(frames, how="vertical")
+
+    def view(self, symbol: str) -> pl.LazyFrame:
+        """Lazy frame for one symbol, rebuilt only when a partition or contract folder changed."""
+        # partitions are swapped in with a rename, so the folder mtimes move on every write
+        key = tuple(
+            (folder, os.stat(folder).st_mtime_ns)
+            for folder in self._folders(symbol)
+        )
+        cached = self._views.get(symbol)
+        if cached is None or cached[0] != key:
+            cached = self._views[symbol] = (key, self._scan(symbol))
+        return cached[1]
+
+    def context(self) -> pl.SQLContext:
+        views = {symbol.lower(): self.view(symbol) for symbol in self.symbols()}
+        bars = pl.concat([frame.with_columns(pl.lit(name).alias("instrument")) for name, frame in views.items()]) if views else None
+        return pl.SQLContext({**views, **({"bars": bars} if bars is not None else {})})
+
+    def query(self, sql: str) -> pl.DataFrame:
+        return self.context().execute(sql, eager=True)
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--root", default="./data", help="Parquet lake root")
+def views(root: str):
+    """List the views and their columns."""
+    ctx = LakeSQL(root).context()
+    for name in ctx.tables():
+        print(name, dict(ctx.execute(f"SELECT * FROM {name}").collect_schema()))
+
+
+@cli.command()
+@click.argument("sql")
+@click.option("--root", default="./data", help="Parquet lake root")
+@click.option("--repeat", default=1, help="run the query this many times and report each timing")
+@click.option("--rows", default=50, help="rows to print")
+def query(sql: str, root: str, repeat: int, rows: int):
+    lake = LakeSQL(root)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = lake.query(sql)
+        print(f"{len(df):,} row(s) in {time.perf_counter() - start:.3f}s")
+    with pl.Config(tbl_rows=rows, tbl_cols=-1):
+        print(df)
+
+
+if __name__ == "__main__":
+    cli()
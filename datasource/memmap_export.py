@@ -0,0 +1,207 @@
+"""
+Export the Parquet lake into per-symbol, per-column `.npy` files for backtesting.
+
+Layout:
+    <out_dir>/<symbol>/{t,o,h,l,c,v}.<gen>.npy  one contiguous typed column each
+    <out_dir>/<symbol>/index.json              generation, per-day [start, stop) row offsets + source fingerprints
+
+Every `.npy` is written with a fixed-size header, so new days are appended in
+place and only the header is rewritten. A column file only ever grows: rows
+that `index.json` points at are never changed or cut off, because backtests
+may have them mapped. When a day already exported changed in the lake
+(typically today, updated every 5 minutes), the kept prefix and the new tail
+are written to a new generation of files and `index.json` is swapped last.
+Open maps keep the old generation's pages; it is deleted one generation later.
+Readers open the columns with `np.load(..., mmap_mode="r")`: no decode, and the
+OS page cache is shared between parallel backtests.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date
+
+import click
+import numpy as np
+import polars as pl
+
+from datasource.base import DataSource
+from utils.timing import timeit_ns
+
+__all__ = ["COLUMNS", "MemmapExporter", "MemmapBars", "open_symbol"]
+
+logger = logging.getLogger(__name__)
+
+# t is the naive Asia/Ho_Chi_Minh wall clock, same convention as datasource.panel
+COLUMNS: dict[str, np.dtype] = {
+    "t": np.dtype("datetime64[ns]"),
+    "o": np.dtype("float64"),
+    "h": np.dtype("float64"),
+    "l": np.dtype("float64"),
+    "c": np.dtype("float64"),
+    "v": np.dtype("int64"),
+}
+
+_MAGIC = b"\x93NUMPY\x01\x00"
+_HEADER_SIZE = 128          # magic(8) + header length(2) + padded dict; room for any realistic row count
+
+
+def _header(dtype: np.dtype, rows: int) -> bytes:
+    text = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)})
+    body_len = _HEADER_SIZE - len(_MAGIC) - 2
+    body = text.ljust(body_len - 1).encode("latin1") + b"\n"
+    return _MAGIC + body_len.to_bytes(2, "little") + body
+
+
+def _column_path(out_dir: str, symbol: str, name: str, generation: int) -> str:
+    return f"{out_dir}/{symbol}/{name}.{generation}.npy"
+
+
+class _Column:
+    """An append-only `.npy` file whose header is rewritten in place; it is never truncated."""
+
+    def __init__(self, path: str, dtype: np.dtype, fresh: bool = False):
+        self.path = path
+        self.dtype = dtype
+        if fresh or not os.path.exists(path):
+            with open(path, "wb") as fh:
+                fh.write(_header(dtype, 0))
+
+    def append(self, values: np.ndarray, rows_before: int) -> None:
+        with open(self.path, "r+b") as fh:
+            fh.seek(_HEADER_SIZE + rows_before * self.dtype.itemsize)
+            fh.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+            fh.seek(0)
+            fh.write(_header(self.dtype, rows_before + len(values)))
+
+
+class MemmapExporter:
+    def __init__(self, source: DataSource, out_dir: str = "../cache/memmap"):
+        self.source = source
+        self.out_dir = out_dir
+
+    def _index_path(self, symbol: str) -> str:
+        return f"{self.out_dir}/{symbol}/index.json"
+
+    def _read_index(self, symbol: str) -> tuple[int, list[dict]]:
+        """(generation, days); generation 0 means nothing usable was exported yet."""
+        path = self._index_path(symbol)
+        if not os.path.exists(path):
+            return 0, []
+        with open(path) as fh:
+            index = json.load(fh)
+        if "generation" not in index:    # single-file layout from before generations
+            return 0, []
+        return index["generation"], index["days"]
+
+    def _write_index(self, symbol: str, generation: int, days: list[dict]) -> None:
+        path = self._index_path(symbol)
+        with open(f"{path}.tmp", "w") as fh:
+            json.dump({"columns": {k: v.str for k, v in COLUMNS.items()}, "generation": generation, "days": days}, fh)
+        os.replace(f"{path}.tmp", path)
+
+    def _drop_generations(self, symbol: str, keep_from: int) -> None:
+        """Delete column files older than `keep_from`; a reader that just read the previous index may still open those."""
+        for entry in os.scandir(f"{self.out_dir}/{symbol}"):
+            name, _, rest = entry.name.partition(".")
+            gen = rest.removesuffix(".npy")
+            if name in COLUMNS and (rest == "npy" or (gen.isdigit() and int(gen) < keep_from)):
+                os.remove(entry.path)
+
+    @timeit_ns
+    def export(self, symbol: str) -> int:
+        """Bring `<out_dir>/<symbol>` up to date; return the number of days (re)written."""
+        os.makedirs(f"{self.out_dir}/{symbol}", exist_ok=True)
+        dates = self.source.trading_dates(symbol)
+        fingerprints = [self.source.fingerprint(symbol, d) for d in dates]
+        generation, days = self._read_index(symbol)
+
+        # keep the longest prefix of exported days that still matches the lake
+        keep = 0
+        while (
+            keep < min(len(days), len(dates))
+            and days[keep]["date"] == dates[keep].isoformat()
+            and fingerprints[keep] is not None
+            and days[keep]["fingerprint"] == fingerprints[keep]
+        ):
+            keep += 1
+        rows = days[keep - 1]["stop"] if keep else 0
+
+        if generation and keep == len(days):
+            # only new days: append past the last indexed row, nothing a reader maps changes
+            columns = {
+                name: _Column(_column_path(self.out_dir, symbol, name, generation), dtype)
+                for name, dtype in COLUMNS.items()
+            }
+        else:
+            # an exported day changed: rebuild into fresh files, keeping the old ones for open maps
+            previous = generation
+            generation += 1
+            columns = {
+                name: _Column(_column_path(self.out_dir, symbol, name, generation), dtype, fresh=True)
+                for name, dtype in COLUMNS.items()
+            }
+            if keep:
+                for name, col in columns.items():
+                    col.append(np.load(_column_path(self.out_dir, symbol, name, previous), mmap_mode="r")[:rows], 0)
+        days = days[:keep]
+
+        for d, fp in zip(dates[keep:], fingerprints[keep:]):
+            df = self.source.load(symbol, d).select(
+                pl.col("t").dt.replace_time_zone(None).cast(pl.Datetime("ns")),
+                *[pl.col(name).cast(pl.Float64) for name in ("o", "h", "l", "c")],
+                pl.col("v").cast(pl.Int64),
+            )
+            for name, col in columns.items():
+                col.append(df[name].to_numpy(), rows)
+            days.append({"date": d.isoformat(), "start": rows, "stop": rows + df.height, "fingerprint": fp})
+            rows += df.height
+
+        self._write_index(symbol, generation, days)
+        self._drop_generations(symbol, keep_from=generation - 1)
+        logger.info("memmap export %s: %d day(s) kept, %d day(s) written", symbol, keep, len(dates) - keep)
+        return len(dates) - keep
+
+
+@dataclass
+class MemmapBars:
+    columns: dict[str, np.ndarray]      # read-only memmaps
+    days: dict[date, slice]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def day(self, trading_date: date, name: str = "c") -> np.ndarray:
+        return self.columns[name][self.days[trading_date]]
+
+
+def open_symbol(out_dir: str, symbol: str) -> MemmapBars:
+    """Map an exported symbol without reading it."""
+    with open(f"{out_dir}/{symbol}/index.json") as fh:
+        index = json.load(fh)
+    columns = {
+        name: np.load(_column_path(out_dir, symbol, name, index["generation"]), mmap_mode="r")
+        for name in index["columns"]
+    }
+    days = {date.fromisoformat(d["date"]): slice(d["start"], d["stop"]) for d in index["days"]}
+    return MemmapBars(columns=columns, days=days)
+
+
+@click.command()
+@click.option("--root", default="./data", help="Parquet lake root")
+@click.option("--out", "out_dir", default="./cache/memmap", help="export directory")
+@click.option("--symbol", "symbols", multiple=True, default=["VN30", "VN30F"], help="symbol(s) to export")
+def main(root: str, out_dir: str, symbols: tuple[str, ...]):
+    from datasource.file_source import ParquetSource
+
+    exporter = MemmapExporter(ParquetSource(root), out_dir)
+    for symbol in symbols:
+        written = exporter.export(symbol)
+        print(f"{symbol}: {written} day(s) written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Storage schema profile for lake partitions.
+
+`to_storage` / `write_storage` turn a partition frame into its on-disk form:
+
+* prices and other float columns become integer ticks (Decimal stored as INT64, so
+  the scale travels in the schema) when that is lossless, else float32 when that
+  round-trips exactly, else they stay float64;
+* integer, tick and timestamp columns use DELTA_BINARY_PACKED; rows are sorted
+  by `t`, flagged in the row-group `sorting_columns`;
+* `symbol` and `snapshot_dttm` (constant per partition) are dictionary encoded;
+* zstd, page statistics and a page index are always on.
+
+`read_storage` undoes all of it, so every reader sees the same frame as before
+(float64 prices, ns Asia/Ho_Chi_Minh timestamps, per-row snapshot_dttm) whether
+the file was written under this profile or not. `iter_storage_batches` does the
+same for streaming readers, record batch by record batch, into one fixed
+`CANONICAL_SCHEMA`.
+
+Decode cost is per call, not per row, at ~240 rows a file: `read_storage` reads
+one footer and restores types with `Series.cast` only (every expression or
+`Series.dt` call is a query of its own, ~0.05-0.15 ms each). Profile 1 kept
+`snapshot_dttm` in the key-value metadata and `t` in ms, which needed a second
+footer read and three more conversions per load for ~100 bytes a file.
+
+    python datasource/storage_profile.py migrate --root data [--out /tmp/data_v2]
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from datetime import datetime
+from glob import glob
+from typing import Iterator
+
+import click
+import numpy as np
+import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+__all__ = ["PROFILE_VERSION", "CANONICAL_SCHEMA", "to_storage", "write_storage", "read_storage", "iter_storage_batches"]
+
+PROFILE_VERSION = "2"
+TZ = "Asia/Ho_Chi_Minh"
+SNAPSHOT_TZ = "Etc/GMT-7"       # what `helper.date_calculate.now()` yields once in Polars
+ZSTD_LEVEL = 9                  # partitions are ~10 KB: levels 3..19 are within 0.2% of each other
+MAX_TICK_SCALE = 4
+MAX_EXACT_TICKS = 2 ** 53       # every integer up to here is exact in a double
+SORT_COLUMN = "t"
+
+# one schema for every partition of every age (older VN30 files have an int accumulatedValue,
+# older files no snapshot_dttm), so a stream of batches can be concatenated as is
+CANONICAL_SCHEMA = pa.schema([
+    ("symbol", pa.large_string()),
+    ("o", pa.float64()),
+    ("h", pa.float64()),
+    ("l", pa.float64()),
+    ("c", pa.float64()),
+    ("v", pa.int64()),
+    ("t", pa.timestamp("ns", TZ)),
+    ("accumulatedVolume", pa.int64()),
+    ("accumulatedValue", pa.float64()),
+    ("minBatchTruncTime", pa.timestamp("ns", TZ)),
+    ("snapshot_dttm", pa.timestamp("us", SNAPSHOT_TZ)),
+    ("stock_date", pa.date32()),
+])
+# what `read_storage` casts to; integer columns are left as stored
+_CANONICAL_DTYPES = pl.from_arrow(CANONICAL_SCHEMA.empty_table()).schema
+
+
+def _tick_scale(s: pl.Series) -> int | None:
+    """
+    Smallest number of decimals that represents every value of `s` exactly, if any: the ticks must
+    fit a double's 53-bit mantissa, so that `read_storage` (ticks / 10**scale) gives back the very
+    same float, and below 1e16 the float prints without an exponent for the string -> Decimal cast.
+    """
+    values = s.drop_nulls().to_numpy()
+    if len(values) == 0:
+        return 0
+    if not np.isfinite(values).all():
+        return None
+    for scale in range(MAX_TICK_SCALE + 1):
+        ticks = np.round(values * 10 ** scale)
+        # NumPy divides; Polars would multiply by the (inexact) reciprocal of 10**scale
+        if np.abs(ticks).max() <= MAX_EXACT_TICKS and (ticks / 10 ** scale == values).all():
+            return scale
+    return None
+
+
+def to_storage(df: pl.DataFrame) -> tuple[pl.DataFrame, dict[str, str]]:
+    """Return (frame to write, file key-value metadata)."""
+    metadata = {"vnstockdata.profile": PROFILE_VERSION}
+    df = df.drop("stock_date", strict=False)    # the hive folder already holds it
+
+    columns = []
+    for name, dtype in df.schema.items():
+        col = pl.col(name)
+        if dtype == pl.Float64:
+            scale = _tick_scale(df[name])
+            if scale is not None:
+                # Float -> Decimal truncates (1137.11 is 1137.1099.. in binary); the shortest
+                # repr of the rounded float is exactly the tick, so go through the string
+                col = col.round(scale).cast(pl.String).cast(pl.Decimal(18, scale))
+            elif (df[name].cast(pl.Float32).cast(pl.Float64) == df[name]).all():
+                col = col.cast(pl.Float32)
+        columns.append(col)
+    return df.select(columns).sort(SORT_COLUMN), metadata
+
+
+def write_storage(df: pl.DataFrame, path: str) -> None:
+    """Write one partition file under the profile."""
+    out, metadata = to_storage(df)
+    table = out.to_arrow()
+    dictionary = [name for name in ("symbol", "snapshot_dttm") if name in out.columns]
+    delta = [
+        name for name, dtype in out.schema.items()
+        if (dtype.is_integer() or dtype.is_temporal() or isinstance(dtype, pl.Decimal)) and name not in dictionary
+    ]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with pq.ParquetWriter(
+        path,
+        table.schema,
+        compression="zstd",
+        compression_level=ZSTD_LEVEL,
+        use_dictionary=dictionary or False,
+        column_encoding={name: "DELTA_BINARY_PACKED" for name in delta},
+        write_statistics=True,
+        write_page_index=True,
+        store_decimal_as_integer=True,
+        store_schema=False,     # ~1 KB per file; read_storage restores the logical types
+        sorting_columns=[pq.SortingColumn(out.columns.index(SORT_COLUMN))] if SORT_COLUMN in out.columns else None,
+    ) as writer:
+        writer.write_table(table)
+        writer.add_key_value_metadata(metadata)
+
+
+def read_storage(path: str) -> pl.DataFrame:
+    """Read one partition file (any profile) back into the canonical in-memory schema."""
+    df = pl.read_parquet(path, hive_partitioning=False)
+    schema = df.schema
+    columns, converted = [], False
+    for s, (name, dtype) in zip(df.get_columns(), schema.items()):
+        if name == "stock_date":
+            # older writers kept the partition column in the file; the hive folder is authoritative
+            converted = True
+            continue
+        target = _CANONICAL_DTYPES.get(name)
+        # Series.cast only: Decimal ticks -> Float64 is exact, a naive timestamp is read as UTC,
+        # and between time zones the cast keeps the instant
+        if isinstance(dtype, pl.Decimal) or dtype == pl.Float32 or (isinstance(dtype, pl.Datetime) and target is not None and dtype != target):
+            s, converted = s.cast(target or pl.Float64), True
+        elif dtype == pl.Categorical:
+            s, converted = s.cast(pl.String), True
+        if name == SORT_COLUMN and s.is_sorted():
+            s = s.set_sorted()      # write_storage always sorts; older files mostly are too
+        columns.append(s)
+    if not converted:
+        return df      # written before the profile existed: nothing to undo
+    df = pl.DataFrame(columns)
+
+    if "snapshot_dttm" not in schema and getattr(schema.get(SORT_COLUMN), "time_unit", None) == "ms":
+        # profile 1 (the only writer of ms timestamps) kept it in the footer
+        snapshot = pl.read_parquet_metadata(path).get("snapshot_dttm")
+        if snapshot is not None:
+            df = df.with_columns(pl.lit(datetime.fromisoformat(snapshot)).cast(_CANONICAL_DTYPES["snapshot_dttm"]).alias("snapshot_dttm"))
+    return df
+
+
+def _decimal_to_float64(arr: pa.Array) -> pa.Array:
+    """
+    Arrow casts Decimal to float by multiplying with 10**-scale, an ulp off for most prices;
+    dividing the integer ticks gives the nearest double, i.e. the price that was written.
+    """
+    ticks = np.frombuffer(arr.buffers()[1], dtype="<i8")[2 * arr.offset::2][:len(arr)]     # low words: ticks fit in int64
+    mask = arr.is_null().to_numpy(zero_copy_only=False) if arr.null_count else None
+    return pa.array(ticks / 10 ** arr.type.scale, type=pa.float64(), mask=mask)
+
+
+def iter_storage_batches(path: str, stock_date, batch_rows: int = 16_384) -> Iterator[pa.RecordBatch]:
+    """
+    Stream one partition file (any profile) as record batches in `CANONICAL_SCHEMA`.
+    `stock_date` comes from the partition folder; columns outside the schema are dropped.
+    """
+    pf = pq.ParquetFile(path)
+    metadata = pf.metadata.metadata or {}
+    snapshot = metadata.get(b"snapshot_dttm")
+    constants = {
+        "stock_date": pa.scalar(stock_date, pa.date32()),
+        "snapshot_dttm": pa.scalar(datetime.fromisoformat(snapshot.decode()) if snapshot else None, CANONICAL_SCHEMA.field("snapshot_dttm").type),
+    }
+    for batch in pf.iter_batches(batch_size=batch_rows):
+        columns = []
+        for field in CANONICAL_SCHEMA:
+            if field.name in constants and (field.name == "stock_date" or field.name not in batch.schema.names):
+                # the hive folder is authoritative for stock_date, as in read_storage
+                columns.append(pc.fill_null(pa.nulls(batch.num_rows, field.type), constants[field.name]))
+            elif field.name in batch.schema.names and pa.types.is_decimal(batch.schema.field(field.name).type):
+                columns.append(_decimal_to_float64(batch.column(field.name)))
+            elif field.name in batch.schema.names:
+                # float32, ms / UTC timestamps, int accumulatedValue: plain casts in Arrow
+                columns.append(batch.column(field.name).cast(field.type))
+            else:
+                columns.append(pa.nulls(batch.num_rows, field.type))
+        yield pa.RecordBatch.from_arrays(columns, schema=CANONICAL_SCHEMA)
+
+
+# --- migration ---------------------------------------------------------------
+def _load_all(files: list[str], reader=read_storage, repeat: int = 3) -> float:
+    """Best of `repeat` passes, in seconds, decoding every file with `reader`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for f in files:
+            reader(f)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _parse(path: str) -> pl.DataFrame:
+    """Parquet decode alone, types as stored."""
+    return pl.read_parquet(path, hive_partitioning=False)
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--root", default="./data", help="lake root to migrate")
+@click.option("--out", default=None, help="write the migrated lake here instead of in place")
+def migrate(root: str, out: str | None):
+    """Rewrite every partition under the storage profile and report size / load time."""
+    files = sorted(glob(f"{root}/**/stock_date=*/*.parquet", recursive=True))
+    size_before = sum(os.path.getsize(f) for f in files)
+    parse_before, load_before = _load_all(files, _parse), _load_all(files)
+
+    migrated = []
+    for f in files:
+        df = read_storage(f)
+        target = f if out is None else os.path.join(out, os.path.relpath(f, root))
+        tmp = f"{target}.tmp"
+        write_storage(df, tmp)
+        os.replace(tmp, target)
+        migrated.append(target)
+    if out is not None:
+        for extra in glob(f"{root}/**/_partitions.json", recursive=True):
+            shutil.copy2(extra, os.path.join(out, os.path.relpath(extra, root)))
+
+    size_after = sum(os.path.getsize(f) for f in migrated)
+    parse_after, load_after = _load_all(migrated, _parse), _load_all(migrated)
+    print(f"{len(files)} partition files")
+    print(f"size:  {size_before / 1e6:,.2f} MB -> {size_after / 1e6:,.2f} MB ({size_after / size_before - 1:+.1%})")
+    # same reader before and after: `parse` is the encoding alone, `load` what every reader gets
+    print(f"parse: {parse_before:,.3f} s -> {parse_after:,.3f} s ({parse_after / parse_before - 1:+.1%})")
+    print(f"load:  {load_before:,.3f} s -> {load_after:,.3f} s ({load_after / load_before - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,7 +1,9 @@
 from helper.date_calculate import third_thursday
+from collections import Counter
 from time import sleep
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
+from helper.request_planner import plan_windows
 from rest_api_interface import save_historical_data
 from utils.timing import timeit_ns
 import logging
@@ -10,12 +12,14 @@ logger = logging.getLogger(__name__)
 
 
 class DownloadStock:
-    def __init__(self, symbol: str, from_date_yyyymmdd: str, to_date_yyyymmdd: str, interval = relativedelta(days=1), dry_run = False):
+    def __init__(self, symbol: str, from_date_yyyymmdd: str, to_date_yyyymmdd: str, interval = relativedelta(days=1), dry_run = False, time_frame: str = "ONE_MINUTE"):
         self.symbol = symbol
         self.start_date = datetime.strptime(from_date_yyyymmdd, "%Y%m%d")
         self.end_date = datetime.strptime(to_date_yyyymmdd, "%Y%m%d")
         self.interval = interval
         self.dry_run = dry_run
+        self.time_frame = time_frame
+        self.summary = Counter(written=0, skipped=0)
 
     def _get_symbol(self, **kwargs):
         return self.symbol
@@ -28,29 +32,42 @@ class DownloadStock:
         if to_date_yyyymmdd:
             self.end_date = datetime.strptime(to_date_yyyymmdd, "%Y%m%d")
 
-        curr_date = self.start_date
-        while curr_date <= self.end_date:
-            self.api_call(symbol=self._get_symbol(), curr_date=curr_date, base_path="data")
-            curr_date += self.interval
-
-    def api_call(self, symbol: str, curr_date: datetime, **kwargs):
+        self.summary = Counter(written=0, skipped=0)
+        if self.time_frame != "ONE_MINUTE":
+            # coarse bars: a few wide windows instead of one request per day
+            for dt_from, dt_to in plan_windows(self.start_date, self.end_date + relativedelta(hours=23), self.time_frame):
+                self.api_call(symbol=self._get_symbol(), curr_date=dt_from, dt_to=dt_to, base_path="data")
+        else:
+            curr_date = self.start_date
+            while curr_date <= self.end_date:
+                self.api_call(symbol=self._get_symbol(), curr_date=curr_date, base_path="data")
+                curr_date += self.interval
+        self.log_summary()
+        return self.summary
+
+    def log_summary(self):
+        logger.info(f"[{self.symbol} {self.time_frame}] partitions written={self.summary['written']} skipped (unchanged)={self.summary['skipped']}")
+
+    def api_call(self, symbol: str, curr_date: datetime, dt_to: datetime = None, **kwargs):
         logger.info("--" + symbol + " " + curr_date.strftime("%Y-%m-%d") + "-" * 10)
-        save_historical_data(
+        self.summary += save_historical_data(
             symbol=symbol,
             dt_from=curr_date,
-            dt_to=curr_date + relativedelta(hours=23),
+            dt_to=dt_to or curr_date + relativedelta(hours=23),
             dry_run=self.dry_run,
+            time_frame=self.time_frame,
             **kwargs
         )
         sleep(0.001)
 
 
 class DownloadVN30F(DownloadStock):
-    def __init__(self, from_date_yyyymmdd: str, to_date_yyyymmdd: str, symbol="VN30F", dry_run = False):
+    def __init__(self, from_date_yyyymmdd: str, to_date_yyyymmdd: str, symbol="VN30F", dry_run = False, time_frame: str = "ONE_MINUTE"):
         super().__init__(symbol=symbol,
                          from_date_yyyymmdd=from_date_yyyymmdd,
                          to_date_yyyymmdd=to_date_yyyymmdd,
                          dry_run=dry_run,
+                         time_frame=time_frame,
                          )
 
     def _get_symbol(self, **kwargs):
@@ -66,10 +83,25 @@ class DownloadVN30F(DownloadStock):
         if to_date_yyyymmdd:
             self.end_date = datetime.strptime(to_date_yyyymmdd, "%Y%m%d")
 
-        current_month = self.get_current_month(self.start_date)
-        date_range_to_run = self.get_date_range_current_month(current_month_yyyymm=current_month)
-        for date_to_run in date_range_to_run:
-            self.api_call(symbol=self._get_symbol(curr_date=datetime.strptime(current_month, "%Y%m")), curr_date=date_to_run, base_path="data/VN30F")
+        self.summary = Counter(written=0, skipped=0)
+        if self.time_frame != "ONE_MINUTE":
+            # every contract that is the front month within [start, end], one request each (a contract
+            # is the front month for about a month); stored as data/timeframe=<TF>/VN30F/<contract>
+            month = datetime.strptime(self.get_current_month(self.start_date), "%Y%m")
+            while month <= datetime.strptime(self.get_current_month(self.end_date), "%Y%m"):
+                date_range_to_run = self.get_date_range_current_month(current_month_yyyymm=month.strftime("%Y%m"))
+                if date_range_to_run:
+                    self.api_call(symbol=self._get_symbol(curr_date=month), curr_date=date_range_to_run[0],
+                                  dt_to=date_range_to_run[-1] + relativedelta(hours=23), base_path="data", instrument=self.symbol)
+                month += relativedelta(months=1)
+        else:
+            current_month = self.get_current_month(self.start_date)
+            date_range_to_run = self.get_date_range_current_month(current_month_yyyymm=current_month)
+            symbol = self._get_symbol(curr_date=datetime.strptime(current_month, "%Y%m"))
+            for date_to_run in date_range_to_run:
+                self.api_call(symbol=symbol, curr_date=date_to_run, base_path="data/VN30F")
+        self.log_summary()
+        return self.summary
 
     @staticmethod
     def datetime_range(start: datetime,
@@ -104,8 +136,8 @@ class DownloadStockFactory:
             case _:
                 self.engine = DownloadStock(symbol=symbol, dry_run=dry_run, **kwargs)
 
-    def download(self, **kwargs):
-        self.engine.download(**kwargs)
+    def download(self, **kwargs) -> Counter:
+        return self.engine.download(**kwargs)
 
 
 if __name__ == "__main__":
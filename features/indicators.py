@@ -0,0 +1,78 @@
+"""
+Indicator library for the feature engine.
+
+An indicator is a plain Polars expression over the raw 1-minute candle columns
+(`t, o, h, l, c, v`). The engine evaluates every expression per trading session,
+so rolling windows never leak across days.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+
+import polars as pl
+
+__all__ = [
+    "Feature",
+    "log_return",
+    "rolling_vwap",
+    "atr",
+    "volume_zscore",
+    "minutes_since_open",
+    "DEFAULT_FEATURES",
+]
+
+
+@dataclass(frozen=True, eq=False)
+class Feature:
+    name: str
+    expr: pl.Expr
+
+    @property
+    def key(self) -> str:
+        """Hash of the serialized expression: same definition → same cache entry, whatever the name."""
+        return hashlib.sha1(self.expr.meta.serialize(format="json").encode()).hexdigest()[:16]
+
+
+def log_return(col: str = "c", periods: int = 1) -> Feature:
+    return Feature(f"ret_{col}_{periods}", (pl.col(col) / pl.col(col).shift(periods)).log())
+
+
+def rolling_vwap(window: int = 20) -> Feature:
+    typical = (pl.col("h") + pl.col("l") + pl.col("c")) / 3
+    return Feature(
+        f"vwap_{window}",
+        (typical * pl.col("v")).rolling_sum(window, min_samples=1) / pl.col("v").rolling_sum(window, min_samples=1),
+    )
+
+
+def atr(window: int = 14) -> Feature:
+    prev_close = pl.col("c").shift(1)
+    true_range = pl.max_horizontal(
+        pl.col("h") - pl.col("l"),
+        (pl.col("h") - prev_close).abs(),
+        (pl.col("l") - prev_close).abs(),
+    )
+    return Feature(f"atr_{window}", true_range.rolling_mean(window, min_samples=1))
+
+
+def volume_zscore(window: int = 30) -> Feature:
+    v = pl.col("v").cast(pl.Float64)
+    return Feature(
+        f"vol_z_{window}",
+        (v - v.rolling_mean(window, min_samples=2)) / v.rolling_std(window, min_samples=2),
+    )
+
+
+def minutes_since_open() -> Feature:
+    return Feature("minutes_since_open", (pl.col("t") - pl.col("t").min()).dt.total_minutes())
+
+
+DEFAULT_FEATURES: tuple[Feature, ...] = (
+    log_return(),
+    rolling_vwap(),
+    atr(),
+    volume_zscore(),
+    minutes_since_open(),
+)
@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+import polars as pl
+
+# minutes since midnight, Asia/Ho_Chi_Minh
+# trading day: VN30F opens 08:45 (the index a bit later), lunch 11:30-13:00, ATC 14:30-14:45
+SESSION_OPEN, SESSION_CLOSE = 8 * 60 + 45, 14 * 60 + 45
+BREAKS = ((11 * 60 + 30, 13 * 60), (14 * 60 + 30, 14 * 60 + 45))
+GAP_TOLERANCE_MINUTES = 5
+UTC_OFFSET_SECONDS = 7 * 3600   # Vietnam has no DST; cheaper than a tz conversion per bar
+
+CHECKS = ("duplicate_t", "out_of_session", "ohlc_inconsistent", "non_monotonic", "gaps")
+
+
+@lru_cache(maxsize=None)
+def _stages(tol: int) -> tuple[list[pl.Expr], list[pl.Expr], list[pl.Expr]]:
+    """The three projections of the check; built once per tolerance, building them costs ~0.1 ms."""
+    t, clock, step, across_break = pl.col("t"), pl.col("clock"), pl.col("step"), pl.col("across_break")
+    o, h, l, c = pl.col("o"), pl.col("h"), pl.col("l"), pl.col("c")
+    derived = [
+        ((t.dt.epoch("s") + UTC_OFFSET_SECONDS) // 60 % 1440).alias("clock"),
+        t.diff().dt.total_minutes().alias("step"),
+    ]
+    # a column of its own: `gaps` and `max_step_minutes` would each evaluate it otherwise
+    breaks = [
+        pl.any_horizontal(
+            [clock.shift(1).is_between(start - tol, start) & clock.is_between(end, end + tol) for start, end in BREAKS]
+        ).alias("across_break")
+    ]
+    in_lunch = (clock > BREAKS[0][0]) & (clock < BREAKS[0][1])
+    counters = [
+        pl.len().alias("rows"),
+        (pl.len() - t.n_unique()).alias("duplicate_t"),
+        (~clock.is_between(SESSION_OPEN, SESSION_CLOSE) | in_lunch).sum().alias("out_of_session"),
+        ((l > pl.min_horizontal(o, c)) | (h < pl.max_horizontal(o, c)) | (l > h)).sum().alias("ohlc_inconsistent"),
+        (step <= 0).sum().alias("non_monotonic"),
+        ((step > tol) & ~across_break).sum().alias("gaps"),
+        step.filter(~across_break).max().fill_null(0).alias("max_step_minutes"),
+    ]
+    return derived, breaks, counters
+
+
+# three projections over a few hundred rows: planning them costs more than it saves
+_NO_OPTIMIZATIONS = pl.QueryOptFlags.none()
+
+
+def validate_bars(df: pl.DataFrame, gap_tolerance_minutes: int = GAP_TOLERANCE_MINUTES) -> dict:
+    """
+    Data-quality counters for one day of 1-minute bars (columns t, o, h, l, c), in arrival order.
+
+    duplicate_t        bars sharing a timestamp (beyond the first)
+    out_of_session     bars before the open, after the close or inside the lunch break
+    ohlc_inconsistent  low above open/close, high below open/close, or low above high
+    non_monotonic      bars whose timestamp is not after the previous one
+    gaps               jumps longer than `gap_tolerance_minutes`, except across the lunch/ATC breaks
+    max_step_minutes   longest such jump, breaks excluded
+
+    One lazy query, about a quarter of a millisecond per day of bars, so it can run on every
+    5-minute update.
+    """
+    derived, breaks, counters = _stages(gap_tolerance_minutes)
+    report = (
+        df.lazy()
+        .with_columns(derived)
+        .with_columns(breaks)
+        .select(counters)
+        .collect(optimizations=_NO_OPTIMIZATIONS)
+        .row(0, named=True)
+    )
+    report["ok"] = not any(report[k] for k in CHECKS)
+    return report
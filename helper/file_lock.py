@@ -0,0 +1,34 @@
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+
+LOCK_DIR = tempfile.gettempdir()
+
+
+@contextmanager
+def file_lock(name: str, blocking: bool = True, lock_dir: str = LOCK_DIR):
+    """
+    Exclusive advisory lock on `<lock_dir>/<name>.lock` for the duration of the `with` block.
+    Works across processes and across threads (each call opens its own file description).
+    With `blocking=False` it yields False instead of waiting when someone else holds the lock.
+    """
+    os.makedirs(lock_dir, exist_ok=True)
+    with open(os.path.join(lock_dir, f"{name}.lock"), "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def instrument_lock(instrument: str, blocking: bool = True):
+    """
+    Single-writer lock for one lake instrument (`VN30`, `VN30F`): the 5-minute job and the stream
+    poller both take it before writing that instrument's partitions.
+    """
+    return file_lock(f"vnstockdata-{instrument}", blocking=blocking)
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from helper.file_lock import file_lock
+
+MANIFEST_NAME = "_partitions.json"
+# columns that change on every run without the market data changing
+VOLATILE_COLUMNS = ("snapshot_dttm", "stock_date")
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """
+    Stable hash of the data columns of a partition.
+    Column names and dtypes are part of the hash, so a schema change always triggers a rewrite.
+    """
+    data = df.drop(columns=[c for c in VOLATILE_COLUMNS if c in df.columns])
+    h = hashlib.sha1()
+    h.update(repr([(c, str(t)) for c, t in data.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class PartitionManifest:
+    """
+    `<output_path>/_partitions.json`: stock_date → {"hash": content hash, "validation": report}
+    of the partition on disk. One instance per process and output path; the file is re-read only
+    when another process replaced it, so checking an unchanged partition costs one `stat`.
+    """
+
+    _loaded: dict[str, "PartitionManifest"] = {}
+
+    def __init__(self, output_path: str):
+        self.path = f"{output_path}/{MANIFEST_NAME}"
+        # the 5-minute job and the stream poller write the same partitions
+        self.lock_name = "manifest-" + hashlib.sha1(os.path.abspath(self.path).encode()).hexdigest()[:12]
+        self.entries: dict[str, dict] = {}
+        self._version = None
+        self._refresh()
+
+    @classmethod
+    def for_path(cls, output_path: str) -> "PartitionManifest":
+        if output_path not in cls._loaded:
+            cls._loaded[output_path] = cls(output_path)
+        return cls._loaded[output_path]
+
+    def _refresh(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self.entries, self._version = {}, None
+            return
+        # every write is an os.replace, so the inode changes even within one mtime tick
+        version = (st.st_ino, st.st_mtime_ns)
+        if version != self._version:
+            with open(self.path) as fh:
+                self.entries = json.load(fh)
+            self._version = version
+
+    def unchanged(self, stock_date: str, digest: str) -> bool:
+        self._refresh()
+        return self.entries.get(stock_date, {}).get("hash") == digest
+
+    def record(self, stock_date: str, digest: str, validation: dict | None = None) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with file_lock(self.lock_name):
+            # merge into what is on disk now, not into what this process saw last
+            self._refresh()
+            self.entries[stock_date] = {"hash": digest, "validation": validation}
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(dict(sorted(self.entries.items())), fh, indent=1)
+            os.replace(tmp, self.path)
+            st = os.stat(self.path)
+            self._version = (st.st_ino, st.st_mtime_ns)
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+# bars per calendar day, rounded up so a window never overshoots the budget
+# (ONE_HOUR: 09:00..14:00 stamps, counted for every calendar day)
+BARS_PER_DAY = {"ONE_MINUTE": 300, "ONE_HOUR": 7, "ONE_DAY": 1}
+# rows we are comfortable asking the chart endpoint for in one call
+MAX_BARS = 5_000
+
+
+def plan_windows(dt_from: datetime, dt_to: datetime, time_frame: str, max_bars: int = MAX_BARS) -> list[tuple[datetime, datetime]]:
+    """
+    Split [dt_from, dt_to] into the fewest request windows expected to return at most `max_bars`
+    bars each. Windows are contiguous and do not overlap.
+
+    >>> len(plan_windows(datetime(2010, 1, 1), datetime(2025, 6, 1), "ONE_DAY"))
+    2
+    """
+    if time_frame not in BARS_PER_DAY:
+        raise ValueError(f"unknown time frame {time_frame!r}, expected one of {list(BARS_PER_DAY)}")
+    span = timedelta(days=max(1, max_bars // BARS_PER_DAY[time_frame]))
+    windows = []
+    start = dt_from
+    while start <= dt_to:
+        end = min(start + span - timedelta(seconds=1), dt_to)
+        windows.append((start, end))
+        start = end + timedelta(seconds=1)
+    return windows
+
+
+if __name__ == "__main__":
+    for tf in BARS_PER_DAY:
+        print(tf, len(plan_windows(datetime(2010, 1, 1), datetime(2025, 6, 1), tf)))
@@ -1,10 +1,29 @@
+import hashlib
 import os
 import subprocess
 import logging
 from typing import Optional
 
+from helper.file_lock import file_lock
+
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
+
+
+def repo_lock_name(repo_path: str) -> str:
+    """Name of the `file_lock` that serializes git commands and partition swaps in one working tree."""
+    return "git-" + hashlib.sha1(os.path.realpath(repo_path).encode()).hexdigest()[:12]
+
+
+def find_repo(path: str) -> Optional[str]:
+    """Closest directory at or above `path` that holds a `.git`, or None."""
+    path = os.path.realpath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
 
 
 class GitPusher:
@@ -19,6 +38,9 @@ class GitPusher:
     1. If there are uncommitted changes, stage and commit them with an autogenerated message.
     2. Pull from <remote>/<branch> using --rebase (to avoid merge commits).
     3. Push to <remote>/<branch>.
+
+    `pull` and `push` hold a lock per repository, so per-instrument jobs running side by side
+    never run git in the same working tree at the same time.
     """
 
     def __init__(self, repo_path: Optional[str] = None):
@@ -28,6 +50,7 @@ class GitPusher:
         if repo_path is None:
             repo_path = os.getcwd()
         self.repo_path = os.path.abspath(repo_path)
+        self.lock_name = repo_lock_name(self.repo_path)
         logger.debug(f"GitPusher initialized for repo at: {self.repo_path}")
 
     def _run_command(self, cmd: list[str]) -> str:
@@ -84,7 +107,8 @@ class GitPusher:
         Pull upstream changes from <remote>/<branch>.
         """
         logger.info("[GitPusher] Pulling new change")
-        self._run_command(["git", "pull"])
+        with file_lock(self.lock_name):
+            self._run_command(["git", "pull"])
         logger.info("[GitPusher] Pull successful.")
 
     def push(self, remote: str = "origin", branch: str = "main") -> None:
@@ -97,10 +121,11 @@ class GitPusher:
         :param branch: Branch to push (default "main").
         :raises RuntimeError: If any Git command fails.
         """
-        # 1) Commit local changes (if present)
-        self._commit_local_changes()
+        with file_lock(self.lock_name):
+            # 1) Commit local changes (if present)
+            self._commit_local_changes()
 
-        # 2) Push to the remote branch
-        logger.info("[GitPusher] Pushing to %s/%s", remote, branch)
-        self._run_command(["git", "push", remote, branch])
+            # 2) Push to the remote branch
+            logger.info("[GitPusher] Pushing to %s/%s", remote, branch)
+            self._run_command(["git", "push", remote, branch])
         logger.info("[GitPusher] Push successful.")
@@ -1,14 +1,10 @@
 from __future__ import annotations
 
+import logging
+import threading
 import time
 from pathlib import Path
 
-from pytz import timezone
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
-from apscheduler.triggers.cron import CronTrigger
-
 from helper.date_calculate import now
 from utils.shells import run_sh
 from utils.logging_setup import configure_logging
@@ -17,7 +13,7 @@ from utils.logging_setup import configure_logging
 # 1. Logging (rotates daily)
 # ──────────────────────────────────
 BASE_PATH = Path(__file__).resolve().parent.parent       # /apps/vnstockdata
-log = configure_logging(BASE_PATH)                       # one TimedRotatingFileHandler
+log = logging.getLogger()                                # root: configure_logging attaches the handler in __main__
 # no logging.basicConfig → avoids accidental stdout duplication
 
 # ──────────────────────────────────
@@ -26,28 +22,57 @@ log = configure_logging(BASE_PATH)                       # one TimedRotatingFile
 BASE_DIR = Path(__file__).resolve().parent               # /apps/vnstockdata/jobs
 SCRIPT    = BASE_DIR / "tasks" / "update_stock_price_5m.py"
 
+# one job per instrument, so a slow symbol never delays the others
+INSTRUMENTS = ("VN30F", "VN30")
+BUDGET_SECONDS = 300                                     # a run should finish before the next 5-minute tick
+# single writer per symbol inside the scheduler: the early/midday/late jobs of one symbol
+# are separate APScheduler jobs, so max_instances alone does not keep them apart
+_symbol_locks = {symbol: threading.Lock() for symbol in INSTRUMENTS}
+
 
-def run_task(run_dttm: str | None = None) -> None:
-    """Execute update_stock_price_5m.py and stream its output into the same log."""
-    log.info("===> run_task started (%s)", now().isoformat(timespec="seconds"))
+def run_task(run_dttm: str | None = None, symbol: str | None = None) -> None:
+    """Execute update_stock_price_5m.py (for one symbol, or all) and stream its output into the same log."""
+    name = symbol or "all"
+    lock = _symbol_locks.get(symbol) if symbol else None
+    if lock is not None and not lock.acquire(blocking=False):
+        log.warning("[RUNTIME] %s: previous run still in progress, skipping this tick", name)
+        return
+
+    log.info("===> run_task %s started (%s)", name, now().isoformat(timespec="seconds"))
+    started = time.perf_counter()
     try:
         if not SCRIPT.is_file():
             raise FileNotFoundError(SCRIPT)
 
-        cmd = f"python3.10 {SCRIPT}" + (f" --run_dttm {run_dttm}" if run_dttm else "")
+        cmd = f"python3.10 {SCRIPT}" + (f" --run_dttm {run_dttm}" if run_dttm else "") + (f" --symbol {symbol}" if symbol else "")
         log.info("start run %s", cmd)
 
         # Pipe every stdout line from the child process into the main log
-        run_sh(command=cmd, stream_callback=lambda line: log.info(line.rstrip()))
-        log.info("run_task finished OK")
+        returncode, _ = run_sh(command=cmd, stream_callback=lambda line: log.info("[%s] %s", name, line.rstrip()), return_log=True)
+        if returncode:
+            raise RuntimeError(f"{cmd} exited with {returncode}")
+        log.info("run_task %s finished OK", name)
     except Exception as exc:
-        log.exception("run_task failed: %s", exc)
+        log.exception("run_task %s failed: %s", name, exc)
+    finally:
+        elapsed = time.perf_counter() - started
+        level = log.warning if elapsed > BUDGET_SECONDS else log.info
+        level("[RUNTIME] %s: %.1fs (%.0f%% of the %ds budget)", name, elapsed, 100 * elapsed / BUDGET_SECONDS, BUDGET_SECONDS)
+        if lock is not None:
+            lock.release()
 
 
 # ──────────────────────────────────
 # 3. APScheduler setup
 # ──────────────────────────────────
 if __name__ == "__main__":
+    from pytz import timezone
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+    from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
+    from apscheduler.triggers.cron import CronTrigger
+
+    configure_logging(BASE_PATH)                         # one TimedRotatingFileHandler
     vn_tz = timezone("Asia/Ho_Chi_Minh")
 
     scheduler = BackgroundScheduler(
@@ -56,7 +81,9 @@ if __name__ == "__main__":
             "default": ThreadPoolExecutor(4),
             "processpool": ProcessPoolExecutor(2),
         },
-        job_defaults={"coalesce": False, "max_instances": 4},
+        # a tick that fires while the same job is still running is dropped, and ticks missed
+        # while the scheduler was busy collapse into one run
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 60},
         timezone=vn_tz,
     )
 
@@ -65,10 +92,14 @@ if __name__ == "__main__":
     trigger_late   = CronTrigger(day_of_week="mon-fri", hour="14", minute="0-45/5",    timezone=vn_tz)
 
     log.info("--ADD JOBS----------------------------------------------")
-    scheduler.add_job(run_task, trigger_early,  id="job_08_early",  replace_existing=True)
-    scheduler.add_job(run_task, trigger_midday, id="job_09_13_mid", replace_existing=True)
-    scheduler.add_job(run_task, trigger_late,   id="job_14_late",   replace_existing=True)
+    for symbol in INSTRUMENTS:
+        scheduler.add_job(run_task, trigger_early,  id=f"job_08_early_{symbol}",  kwargs={"symbol": symbol}, replace_existing=True)
+        scheduler.add_job(run_task, trigger_midday, id=f"job_09_13_mid_{symbol}", kwargs={"symbol": symbol}, replace_existing=True)
+        scheduler.add_job(run_task, trigger_late,   id=f"job_14_late_{symbol}",   kwargs={"symbol": symbol}, replace_existing=True)
     scheduler.start()
+    for old_id in ("job_08_early", "job_09_13_mid", "job_14_late"):   # monolithic jobs left in jobs.sqlite
+        if scheduler.get_job(old_id):
+            scheduler.remove_job(old_id)
 
     log.info("------------------------------------------------")
     for job in scheduler.get_jobs():
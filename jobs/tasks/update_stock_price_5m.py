@@ -1,44 +1,67 @@
-from download_data import DownloadStockFactory
-from helper.update_git import GitPusher
-from utils.timing import timeit_ns
-from dotenv import load_dotenv
-from helper.date_calculate import now
+"""
+5-minute update of today's partitions. Importing this module runs nothing and loads nothing heavy:
+`.env`, pandas/polars/httpx (through download_data) and the git helper are only touched once a run
+starts, so the scheduler's subprocess and `--help` start fast (see utils/startup_bench.py).
+"""
+from collections import Counter
+from contextlib import ExitStack
 from os import getenv
-from utils.env_info import get_platform
 from pathlib import Path
+import logging
 import click
 
-load_dotenv()
-PROJECT_HOME = Path(__file__).resolve().parent.parent.as_posix() if get_platform() == "mac" else getenv("PROJECT_HOME")
+from helper.date_calculate import now
+from helper.file_lock import instrument_lock
+from utils.timing import timeit_ns
 
+SYMBOLS = ("VN30F", "VN30")
 
-src_VN30F = DownloadStockFactory(symbol="VN30F", from_date_yyyymmdd="20250601", to_date_yyyymmdd="20250601", dry_run=False)
-src_VN30 = DownloadStockFactory(symbol="VN30", from_date_yyyymmdd="20250601", to_date_yyyymmdd="20250601", dry_run=False)
-git_helper = GitPusher(repo_path=PROJECT_HOME)
+
+def project_home() -> str | None:
+    from dotenv import load_dotenv
+    from utils.env_info import get_platform
+
+    load_dotenv()
+    return Path(__file__).resolve().parent.parent.as_posix() if get_platform() == "mac" else getenv("PROJECT_HOME")
 
 
 @timeit_ns
-def get_data_today(run_dttm: str = None, dry_run = False):
+def get_data_today(run_dttm: str = None, dry_run = False, symbols: tuple[str, ...] = SYMBOLS, git: bool = True):
+    from download_data import DownloadStockFactory
+    from helper.update_git import GitPusher
+
     run_dttm = run_dttm or now().strftime("%Y%m%d")
 
-    if not dry_run:
-        git_helper.pull()
+    with ExitStack() as stack:
+        # one writer per symbol: a run that finds the symbol busy leaves it to the run holding it
+        owned = [s for s in symbols if stack.enter_context(instrument_lock(s, blocking=False))]
+        for s in set(symbols) - set(owned):
+            print(f"skip {s}: another run is still writing it")
+        if not owned:
+            return
 
-    if dry_run:
-        src_VN30F.engine.dry_run = True
-        src_VN30.engine.dry_run = True
+        git_helper = GitPusher(repo_path=project_home()) if git and not dry_run else None
+        if git_helper:
+            git_helper.pull()
 
-    src_VN30F.download(from_date_yyyymmdd=run_dttm, to_date_yyyymmdd=run_dttm)
-    src_VN30.download(from_date_yyyymmdd=run_dttm, to_date_yyyymmdd=run_dttm)
+        summary = Counter(written=0, skipped=0)
+        for s in owned:
+            source = DownloadStockFactory(symbol=s, from_date_yyyymmdd=run_dttm, to_date_yyyymmdd=run_dttm, dry_run=dry_run)
+            summary += source.download()
+        print(f"run summary {','.join(owned)}: partitions written={summary['written']} skipped (unchanged)={summary['skipped']}")
 
-    if not dry_run:
-        git_helper.push()
+        if git_helper:
+            git_helper.push()
 
 
 @click.command()
 @click.option("--run_dttm", default=None, help="run date (default now)")
-def production(run_dttm: str = None):
-    get_data_today(run_dttm=run_dttm)
+@click.option("--symbol", "symbols", multiple=True, type=click.Choice(SYMBOLS), help="instrument(s) to update (default all)")
+@click.option("--git/--no-git", default=True, help="pull before and push after the update")
+def production(run_dttm: str = None, symbols: tuple[str, ...] = (), git: bool = True):
+    # configured here rather than at import; the scheduler streams this output into its log
+    logging.basicConfig(level=logging.INFO)
+    get_data_today(run_dttm=run_dttm, symbols=symbols or SYMBOLS, git=git)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
-from jobs.schedule_5m import run_task
+from jobs.schedule_5m import BASE_PATH, run_task
+from utils.logging_setup import configure_logging
 
 if __name__ == "__main__":
+    configure_logging(BASE_PATH)
     run_task(run_dttm="20250616")
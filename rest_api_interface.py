@@ -1,19 +1,31 @@
 from abc import ABC, abstractmethod
+from collections import Counter
 from datetime import datetime
 import httpx
 import pandas as pd
 import numpy as np
 import logging
+import os
+import shutil
+from contextlib import nullcontext
 import polars as pl
 
 from utils.debug import print_table
 from utils.timing import timeit_ns
-from utils.shells import run_sh
 from helper.agent import get_headers
 from helper.date_calculate import now
+from helper.file_lock import file_lock
+from helper.partition_hash import PartitionManifest, content_hash
+from helper.bar_validation import CHECKS, validate_bars
+from helper.update_git import find_repo, repo_lock_name
+from datasource.storage_profile import read_storage, write_storage
 
 logger = logging.getLogger(__name__)
 
+# `timeFrame` values accepted by the chart endpoint; anything coarser than a minute is
+# stored under data/timeframe=<TF>/<symbol>/year=YYYY, outside the 1-minute lake
+TIME_FRAMES = ("ONE_MINUTE", "ONE_HOUR", "ONE_DAY")
+
 
 class StockMixin:
     @staticmethod
@@ -94,17 +106,21 @@ class CandleFetcher(DataFetcher):
     ENDPOINT = "https://trading.vietcap.com.vn/api/chart/OHLCChart/gap"
 
     def __init__(self, symbol: str,
-                 dt_from: datetime, dt_to: datetime):
+                 dt_from: datetime, dt_to: datetime,
+                 time_frame: str = "ONE_MINUTE"):
+        if time_frame not in TIME_FRAMES:
+            raise ValueError(f"unknown time frame {time_frame!r}, expected one of {TIME_FRAMES}")
         self.symbol = symbol
         self.dt_from = dt_from
         self.dt_to = dt_to
+        self.time_frame = time_frame
 
     def endpoint_url(self) -> str:
         return self.ENDPOINT
 
     def build_payload(self) -> dict:
         return {
-            "timeFrame": "ONE_MINUTE",
+            "timeFrame": self.time_frame,
             "symbols": [self.symbol],
             "from": int(self.dt_from.timestamp()),
             "to":   int(self.dt_to.timestamp()),
@@ -149,9 +165,10 @@ class StockService:
     @staticmethod
     def get_candle(
         symbol: str,
-        dt_from: datetime, dt_to: datetime
+        dt_from: datetime, dt_to: datetime,
+        time_frame: str = "ONE_MINUTE"
     ) -> pd.DataFrame:
-        return CandleFetcher(symbol, dt_from, dt_to).fetch()
+        return CandleFetcher(symbol, dt_from, dt_to, time_frame=time_frame).fetch()
 
     @staticmethod
     def get_matching(
@@ -169,31 +186,122 @@ class StockService:
 # print_table(pd.DataFrame(data[0]), 1000)
 
 
+def bar_frame(df: pd.DataFrame) -> pl.DataFrame:
+    """The columns `validate_partition` checks, as polars; convert once per batch, not once per day."""
+    # `.values` of a tz-aware column is its UTC datetime64 array: no per-row tz conversion,
+    # which would cost more than the checks themselves
+    return pl.DataFrame({col: df[col].values for col in ("t", "o", "h", "l", "c")})
+
+
+def validate_partition(bars: pl.DataFrame, symbol: str, stock_date) -> dict:
+    """Run the data-quality checks on one day of bars (see `bar_frame`) and log what fails."""
+    report = validate_bars(bars)
+    if not report["ok"]:
+        failed = {k: report[k] for k in CHECKS if report[k]}
+        logger.warning(f"[VALIDATION] {symbol} {stock_date}: {failed} (max step {report['max_step_minutes']} min)")
+    return report
+
+
+def _replace_partition(df_out: pd.DataFrame, output_path: str, key: str, partition: str, dry_run = False, validation: dict | None = None) -> bool:
+    """Write `df_out` as `<output_path>/<partition>/0.parquet` unless the manifest says `key` already holds it."""
+    manifest = PartitionManifest.for_path(output_path)
+    partition = f"{output_path}/{partition}"
+    digest = content_hash(df_out)
+    if manifest.unchanged(key, digest) and os.path.isdir(partition):
+        logger.info(f"unchanged, skip write {partition=}")
+        return False
+
+    if not dry_run:
+        logger.info(f"write to file {output_path=}")
+        # build the new partition beside the old one and swap it in, so readers never see a
+        # half-written file (hidden, `*.tmp`: ignored by readers and by git)
+        hidden = f"{os.path.dirname(partition)}/.{os.path.basename(partition)}"
+        staging, retired = f"{hidden}.tmp", f"{hidden}.old.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        write_storage(pl.from_pandas(df_out), f"{staging}/0.parquet")
+        # the partition is missing between the two renames; holding the repository lock keeps
+        # a `git add .` from the other instrument's job out of that window
+        repo = find_repo(output_path)
+        with file_lock(repo_lock_name(repo)) if repo else nullcontext():
+            shutil.rmtree(retired, ignore_errors=True)
+            if os.path.isdir(partition):
+                os.rename(partition, retired)
+            os.rename(staging, partition)
+        shutil.rmtree(retired, ignore_errors=True)
+        manifest.record(key, digest, validation)
+    else:
+        logger.info(f"[DRY RUN] rm -rf {partition}")
+        logger.info(f"[DRY RUN] saving data to {output_path=}")
+    return True
+
+
+def write_partition(df_out: pd.DataFrame, output_path: str, stock_date, dry_run = False, validation: dict | None = None) -> bool:
+    """
+    Replace the `stock_date=` partition under `output_path` with `df_out`.
+    Skipped (returns False) when the data columns hash to what is already on disk.
+    `validation` is recorded next to the hash in the partition manifest.
+    """
+    partition_date = stock_date.strftime('%Y-%m-%d')
+    return _replace_partition(df_out, output_path, key=partition_date, partition=f"stock_date={partition_date}", dry_run=dry_run, validation=validation)
+
+
+def timeframe_path(base_path: str, time_frame: str, symbol: str, instrument: str | None = None) -> str:
+    """`<base>/timeframe=<TF>/<symbol>`; a futures contract goes under its instrument, `.../VN30F/<contract>`."""
+    folder = f"{instrument}/{symbol}" if instrument else symbol
+    return f"{base_path}/timeframe={time_frame}/{folder}"
+
+
+def write_year_partition(df_out: pd.DataFrame, output_path: str, year: int, dry_run = False) -> bool:
+    """
+    Merge coarse bars into the `year=` partition under `output_path`. A request window rarely
+    covers a whole year, so the bars already on disk are kept and only overwritten on equal `t`.
+    """
+    partition = f"year={year}"
+    existing = f"{output_path}/{partition}/0.parquet"
+    if os.path.exists(existing):
+        df_old = read_storage(existing).to_pandas()
+        df_out = pd.concat([df_old, df_out], ignore_index=True).drop_duplicates(subset=["t"], keep="last")
+    df_out = df_out.sort_values("t", ignore_index=True)
+    return _replace_partition(df_out, output_path, key=partition, partition=partition, dry_run=dry_run)
+
+
 @timeit_ns
-def save_historical_data(symbol: str, base_path: str = "./data", stock_service: StockService = None, dry_run = False, **kwargs):
+def save_historical_data(symbol: str, base_path: str = "./data", stock_service: StockService = None, dry_run = False, time_frame: str = "ONE_MINUTE", instrument: str | None = None, **kwargs) -> Counter:
+    """
+    Fetch candles and write one partition per day (per year for coarse time frames);
+    returns counts of `written` / `skipped` partitions.
+    `instrument` files coarse bars of a futures contract under its instrument (see `timeframe_path`).
+    """
     if not stock_service:
         stock_service = StockService()
 
-    df_candle = stock_service.get_candle(symbol=symbol, **kwargs)
-    if df_candle is not None:
+    summary = Counter(written=0, skipped=0)
+    df_candle = stock_service.get_candle(symbol=symbol, time_frame=time_frame, **kwargs)
+    if df_candle is not None and time_frame != "ONE_MINUTE":
+        df_candle["snapshot_dttm"] = now()
+        output_path = timeframe_path(base_path, time_frame, symbol, instrument)
+        for year, df_out in df_candle.groupby(df_candle["t"].dt.year):
+            print_table(df_out, 3, print_callback=logger.info)
+            written = write_year_partition(df_out, output_path=output_path, year=year, dry_run=dry_run)
+            summary["written" if written else "skipped"] += 1
+    elif df_candle is not None:
         df_candle["stock_date"] = df_candle["t"].dt.date
         df_candle["snapshot_dttm"] = now()
 
-        list_date = df_candle["stock_date"].unique().tolist()
-        for d in list_date:
-            df_out = df_candle[df_candle["stock_date"] == d]
-
-            if df_out.size > 0:
-                print_table(df_out, 3, print_callback=logger.info)
-                output_path = f"{base_path}/{symbol}"
-
-                if not dry_run:
-                    logger.info(f"write to file {output_path=}")
-                    run_sh(f"rm -rf {output_path}/stock_date={d.strftime('%Y-%m-%d')}")
-                    df_write = pl.from_pandas(df_out)
-                    df_write.write_parquet(file=output_path, partition_by=["stock_date"])
-                else:
-                    logger.info(f"[DRY RUN] rm -rf {output_path}/stock_date={d.strftime('%Y-%m-%d')}")
-                    logger.info(f"[DRY RUN] saving data to {output_path=}")
-
-                logger.info("-" * 20 + F" FINISH {d} " + "-" * 20)
+        # split into days in one pass each side (a mask per day costs ~4 ms on a long history),
+        # and convert to polars once for the whole response
+        days = df_candle.groupby("stock_date", sort=False)
+        bars = bar_frame(df_candle)
+        if days.ngroups > 1:
+            day_bars = bars.with_columns(stock_date=pl.Series(df_candle["stock_date"].values)).partition_by(
+                "stock_date", as_dict=True, include_key=False, maintain_order=True)
+        else:
+            day_bars = {(d,): bars for d in df_candle["stock_date"].iloc[:1]}
+
+        for d, df_out in days:
+            print_table(df_out, 3, print_callback=logger.info)
+            validation = validate_partition(day_bars[(d,)], symbol=symbol, stock_date=d)
+            written = write_partition(df_out, output_path=f"{base_path}/{symbol}", stock_date=d, dry_run=dry_run, validation=validation)
+            summary["written" if written else "skipped"] += 1
+            logger.info("-" * 20 + F" FINISH {d} " + "-" * 20)
+    return summary
@@ -0,0 +1,257 @@
+"""
+Local read API over the data lake.
+
+    GET /bars?symbol=VN30&symbol=VN30F&start=2025-06-01&end=2025-06-30&timeframe=5m[&format=json]
+    GET /health
+
+Bars are streamed day by day (symbol-major, then date order) as an Arrow IPC
+stream, or as a JSON array when `format=json` / `Accept: application/json`,
+so a large range is never materialized in memory.
+
+All requests share one LRU of finished per-day results, keyed by the partition
+fingerprint so the 5-minute updates are picked up. It is the only cache: the
+source is uncached, since a partition is only decoded when a result of it is
+missing. Concurrent requests for the same (symbol, day, timeframe) are
+coalesced: only the first one computes it, the others wait for its result.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import click
+import polars as pl
+import pyarrow as pa
+
+from datasource.base import DataSource
+from datasource.factory import datasource_builder
+
+__all__ = ["TIMEFRAMES", "BarService", "make_server"]
+
+logger = logging.getLogger(__name__)
+
+CACHE_DAYS = 2048         # results kept; ~250 rows per day: a few tens of MB for years of VN30 + VN30F
+
+TIMEFRAMES = {"1m": None, "5m": "5m", "15m": "15m", "30m": "30m", "1h": "1h", "1d": "1d"}
+
+BAR_SCHEMA = {
+    "symbol": pl.String,
+    "t": pl.Datetime("ns", "Asia/Ho_Chi_Minh"),
+    "o": pl.Float64,
+    "h": pl.Float64,
+    "l": pl.Float64,
+    "c": pl.Float64,
+    "v": pl.Int64,
+}
+
+
+class BarService:
+    def __init__(self, source: DataSource, max_results: int = CACHE_DAYS):
+        self.source = source
+        self.max_results = max_results
+        self._results: OrderedDict[tuple, pa.Table] = OrderedDict()   # LRU of finished (symbol, day, timeframe)
+        self._inflight: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def _compute(self, symbol: str, trading_date: date, timeframe: str) -> pa.Table:
+        df = self.source.load(symbol, trading_date).select(
+            [pl.col(name).cast(dtype) for name, dtype in BAR_SCHEMA.items()]
+        )
+        every = TIMEFRAMES[timeframe]
+        if every is not None:
+            df = (
+                df.group_by(pl.col("t").dt.truncate(every), maintain_order=True)
+                .agg(
+                    pl.col("symbol").last(),
+                    pl.col("o").first(),
+                    pl.col("h").max(),
+                    pl.col("l").min(),
+                    pl.col("c").last(),
+                    pl.col("v").sum(),
+                )
+                .select(list(BAR_SCHEMA))
+            )
+        # Arrow tables are immutable, so one result can be handed to many request threads
+        # (a shared Polars frame cannot: to_arrow() may rechunk it in place)
+        return df.to_arrow()
+
+    def day(self, symbol: str, trading_date: date, timeframe: str) -> pa.Table:
+        """Bars of one day; identical concurrent calls share a single computation."""
+        key = (symbol, trading_date, timeframe, self.source.fingerprint(symbol, trading_date))
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            table = self._compute(symbol, trading_date, timeframe)
+            future.set_result(table)
+            with self._lock:
+                self._results[key] = table
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    def iter_bars(self, symbols: list[str], start: date | None, end: date | None, timeframe: str):
+        for symbol in symbols:
+            for d in self.source.trading_dates(symbol, start, end):
+                yield self.day(symbol, d, timeframe)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: BarService     # injected by make_server
+
+    def log_message(self, fmt, *args):
+        logger.debug("%s - %s", self.address_string(), fmt % args)
+
+    def _json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._json(200, {"status": "ok"})
+        if url.path != "/bars":
+            return self._json(404, {"error": f"unknown path {url.path}"})
+
+        query = parse_qs(url.query)
+        try:
+            symbols = query["symbol"]
+            start = date.fromisoformat(query["start"][0]) if "start" in query else None
+            end = date.fromisoformat(query["end"][0]) if "end" in query else None
+            timeframe = query.get("timeframe", ["1m"])[0]
+            if timeframe not in TIMEFRAMES:
+                raise ValueError(f"timeframe must be one of {list(TIMEFRAMES)}")
+        except (KeyError, ValueError) as exc:
+            return self._json(400, {"error": f"bad query: {exc}"})
+
+        as_json = query.get("format", [""])[0] == "json" or "application/json" in self.headers.get("Accept", "")
+        bars = self.service.iter_bars(symbols, start, end, timeframe)
+        try:
+            if as_json:
+                self._stream_json(bars)
+            else:
+                self._stream_arrow(bars)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("client went away: %s", self.path)
+
+    # HTTP/1.0 without Content-Length: the body ends when the connection closes,
+    # which lets every day be written as soon as it is ready.
+    def _stream_arrow(self, bars):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.apache.arrow.stream")
+        self.end_headers()
+        schema = pl.DataFrame(schema=BAR_SCHEMA).to_arrow().schema
+        with pa.ipc.new_stream(self.wfile, schema) as writer:
+            for table in bars:
+                writer.write_table(table)
+
+    def _stream_json(self, bars):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"[")
+        first = True
+        for table in bars:
+            if table.num_rows == 0:
+                continue
+            rows = pl.from_arrow(table).write_json()[1:-1]    # strip the enclosing [ ]
+            self.wfile.write((rows if first else "," + rows).encode())
+            first = False
+        self.wfile.write(b"]")
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, source: DataSource | None = None) -> ThreadingHTTPServer:
+    service = BarService(source or datasource_builder(use_cache=False))
+    handler = type("BarHandler", (_Handler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--root", default="./data", help="Parquet lake root")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", default=8765, type=int)
+def serve(root: str, host: str, port: int):
+    server = make_server(host, port, datasource_builder(root, use_cache=False))
+    print(f"serving bars from {root} on http://{host}:{port}")
+    server.serve_forever()
+
+
+@cli.command()
+@click.option("--root", default="./data", help="Parquet lake root")
+@click.option("--clients", default=16, type=int, help="concurrent clients")
+@click.option("--requests", "n_requests", default=10, type=int, help="requests per client")
+@click.option("--start", default="2025-01-01")
+@click.option("--end", default="2025-06-30")
+@click.option("--timeframe", default="1m")
+@click.option("--format", "fmt", default="arrow", type=click.Choice(["arrow", "json"]))
+def bench(root: str, clients: int, n_requests: int, start: str, end: str, timeframe: str, fmt: str):
+    """Start an in-process server and hit it with concurrent clients."""
+    import httpx
+    from concurrent.futures import ThreadPoolExecutor
+
+    server = make_server(port=0, source=datasource_builder(root, use_cache=False))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/bars"
+    params = {"symbol": ["VN30", "VN30F"], "start": start, "end": end, "timeframe": timeframe, "format": fmt}
+
+    def client(_):
+        latencies, rows = [], 0
+        with httpx.Client(timeout=300) as http:
+            for _ in range(n_requests):
+                t0 = time.perf_counter()
+                resp = http.get(url, params=params)
+                resp.raise_for_status()
+                if fmt == "arrow":
+                    rows += pa.ipc.open_stream(resp.content).read_all().num_rows
+                else:
+                    rows += len(resp.json())
+                latencies.append(time.perf_counter() - t0)
+        return latencies, rows
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+
+    latencies = sorted(x for lat, _ in results for x in lat)
+    total_rows = sum(r for _, r in results)
+    print(f"{len(latencies)} requests from {clients} clients in {elapsed:.2f}s "
+          f"→ {len(latencies) / elapsed:,.1f} req/s, {total_rows / elapsed:,.0f} rows/s")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1e3:,.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1e3:,.1f} ms")
+
+
+if __name__ == "__main__":
+    cli()
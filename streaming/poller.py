@@ -0,0 +1,247 @@
+"""
+Near-real-time polling mode.
+
+Every `interval` seconds the poller asks `CandleFetcher` for the bars since the
+last one it has seen (and optionally `MatchingFetcher` for the latest ticks),
+pushes them into one `RingBuffer` per symbol and notifies subscribers in the
+same process. The still-open last bar is refreshed in place rather than
+appended again.
+
+Disk is off the hot path: the day's bars are accumulated in memory and written
+to the usual `stock_date=` partition every `flush_interval` seconds (and on
+stop), through the same `write_partition` as the 5-minute job and under the
+same per-instrument writer lock. Ticks are kept in memory only, the lake has
+no tick layout.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import Counter
+from datetime import date, datetime
+from typing import Callable
+
+import click
+import numpy as np
+import pandas as pd
+
+from helper.date_calculate import now
+from helper.file_lock import instrument_lock
+from rest_api_interface import StockService, bar_frame, validate_partition, write_partition
+from streaming.ring_buffer import BAR_DTYPE, TICK_DTYPE, RingBuffer
+
+__all__ = ["StreamPoller", "default_instruments", "default_targets"]
+
+logger = logging.getLogger(__name__)
+
+Subscriber = Callable[[str, str, np.ndarray], None]     # (symbol, "bar" | "tick", rows)
+
+BAR_COLUMNS = {"t": "t", "o": "o", "h": "h", "l": "l", "c": "c", "v": "v"}
+# LEData/getAll field names; transform_json already turns truncTime into a tz-aware timestamp
+TICK_COLUMNS = {"truncTime": "t", "matchPrice": "price", "matchVol": "volume"}
+
+
+def _to_rows(df: pd.DataFrame, columns: dict[str, str], dtype: np.dtype) -> np.ndarray:
+    rows = np.zeros(len(df), dtype=dtype)
+    for src, dst in columns.items():
+        col = df[src]
+        if dst == "t":
+            col = col.dt.tz_localize(None)      # keep the Asia/Ho_Chi_Minh wall clock
+        rows[dst] = col.to_numpy()
+    return rows
+
+
+def _front_month(run_dttm: datetime | None = None) -> str:
+    from download_data import DownloadVN30F
+    from helper.date_calculate import krx_vn30f_code
+
+    run_dttm = run_dttm or now().replace(tzinfo=None)
+    front = datetime.strptime(DownloadVN30F.get_current_month(run_dttm), "%Y%m")
+    return krx_vn30f_code(front.year, front.month)
+
+
+def default_targets(run_dttm: datetime | None = None) -> dict[str, str]:
+    """Symbol → output base path for VN30 and the front-month VN30F contract, as the 5-minute job writes them."""
+    return {"VN30": "data", _front_month(run_dttm): "data/VN30F"}
+
+
+def default_instruments(run_dttm: datetime | None = None) -> dict[str, str]:
+    """Symbol → instrument whose writer lock the 5-minute job takes for it (a contract belongs to VN30F)."""
+    return {"VN30": "VN30", _front_month(run_dttm): "VN30F"}
+
+
+class StreamPoller:
+    def __init__(
+        self,
+        targets: dict[str, str],
+        interval: float = 5.0,
+        flush_interval: float = 300.0,
+        capacity: int = 4096,
+        with_ticks: bool = False,
+        tick_limit: int = 1000,
+        dry_run: bool = False,
+        stock_service: StockService | None = None,
+        instruments: dict[str, str] | None = None,
+    ):
+        """instruments  symbol → instrument whose writer lock guards its partitions (default: the symbol)"""
+        self.targets = targets
+        self.instruments = {s: (instruments or {}).get(s, s) for s in targets}
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.with_ticks = with_ticks
+        self.tick_limit = tick_limit
+        self.dry_run = dry_run
+        self.service = stock_service or StockService()
+
+        self.bars = {s: RingBuffer(capacity, BAR_DTYPE) for s in targets}
+        self.ticks = {s: RingBuffer(capacity, TICK_DTYPE) for s in targets} if with_ticks else {}
+
+        self._subscribers: list[Subscriber] = []
+        self._last_bar: dict[str, datetime] = {}
+        self._last_tick: dict[str, tuple[pd.Timestamp, Counter]] = {}     # newest second seen, its records
+        self._day_frames: dict[tuple[str, date], pd.DataFrame] = {}
+        self._dirty: set[tuple[str, date]] = set()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # --- subscriptions -------------------------------------------------------
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Register `callback(symbol, kind, rows)`; returns a function that unsubscribes it."""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _publish(self, symbol: str, kind: str, rows: np.ndarray) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(symbol, kind, rows)
+            except Exception:
+                logger.exception("subscriber %r failed on %s %s", callback, symbol, kind)
+
+    # --- polling -------------------------------------------------------------
+    def _poll_bars(self, symbol: str) -> None:
+        last = self._last_bar.get(symbol)
+        current = now()
+        # first poll of the day covers the whole session so far, so the flushed partition is complete
+        dt_from = last or current.replace(hour=0, minute=0, second=0, microsecond=0)
+        df = self.service.get_candle(symbol=symbol, dt_from=dt_from, dt_to=current)
+        if df is None or df.empty:
+            return
+        df = df.sort_values("t")
+        if last is not None:
+            df = df[df["t"] >= pd.Timestamp(last)]     # the last seen bar may still be updating
+        if df.empty:
+            return
+
+        rows = _to_rows(df, BAR_COLUMNS, BAR_DTYPE)
+        buffer = self.bars[symbol]
+        if buffer.last_t is not None and rows["t"][0] == buffer.last_t:
+            buffer.replace_last(rows[0])
+            buffer.extend(rows[1:])
+        else:
+            buffer.extend(rows)
+        self._last_bar[symbol] = df["t"].iloc[-1].to_pydatetime()
+
+        for d, day in df.groupby(df["t"].dt.date):
+            key = (symbol, d)
+            frame = pd.concat([self._day_frames[key], day]) if key in self._day_frames else day
+            self._day_frames[key] = frame.drop_duplicates(subset=["t"], keep="last")
+            self._dirty.add(key)
+        self._publish(symbol, "bar", rows)
+
+    def _poll_ticks(self, symbol: str) -> None:
+        df = self.service.get_matching(symbol=symbol, limit=self.tick_limit)
+        if df is None or df.empty:
+            return
+        df = df.sort_values("truncTime", kind="stable")
+        newest = df["truncTime"].iloc[-1]
+        last, seen = self._last_tick.get(symbol, (None, Counter()))
+        if last is not None and newest < last:
+            return
+        # truncTime has one-second resolution and the newest second may still be filling up, so a match
+        # is identified by its whole record (hashed), and the records of that second are kept for the next poll
+        keys = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        self._last_tick[symbol] = (newest, Counter(keys[(df["truncTime"] == newest).to_numpy()].tolist()))
+        if last is not None:
+            # of the last second seen, only the occurrences beyond those already taken are new
+            # (counted: two identical matches within one second do happen)
+            nth = pd.Series(keys).groupby(keys).cumcount().to_numpy()
+            taken = np.fromiter((seen[k] for k in keys.tolist()), dtype=np.int64, count=len(keys))
+            df = df[(df["truncTime"] > last).to_numpy() | ((df["truncTime"] == last).to_numpy() & (nth >= taken))]
+        if df.empty:
+            return
+        rows = _to_rows(df, TICK_COLUMNS, TICK_DTYPE)
+        self.ticks[symbol].extend(rows)
+        self._publish(symbol, "tick", rows)
+
+    def poll_once(self) -> None:
+        for symbol in self.targets:
+            try:
+                self._poll_bars(symbol)
+                if self.with_ticks:
+                    self._poll_ticks(symbol)
+            except Exception:
+                logger.exception("polling %s failed", symbol)
+
+    # --- persistence ---------------------------------------------------------
+    def flush(self, blocking: bool = False) -> None:
+        """
+        Write every partition that received bars since the last flush. A partition whose instrument
+        is being written by the 5-minute job stays pending until the next flush, unless `blocking`.
+        """
+        snapshot_dttm = now()
+        for symbol, d in sorted(self._dirty):
+            with instrument_lock(self.instruments[symbol], blocking=blocking) as locked:
+                if not locked:
+                    logger.info("flush %s %s: instrument busy, retry next flush", symbol, d)
+                    continue
+                df_out = self._day_frames[(symbol, d)].assign(stock_date=d, snapshot_dttm=snapshot_dttm)
+                validation = validate_partition(bar_frame(df_out), symbol=symbol, stock_date=d)
+                write_partition(df_out, output_path=f"{self.targets[symbol]}/{symbol}", stock_date=d, dry_run=self.dry_run, validation=validation)
+            self._dirty.discard((symbol, d))
+        today = now().date()
+        for key in [k for k in self._day_frames if k[1] < today and k not in self._dirty]:
+            del self._day_frames[key]
+
+    # --- lifecycle -----------------------------------------------------------
+    def run(self) -> None:
+        """Poll until `stop()`; blocking."""
+        next_flush = now().timestamp() + self.flush_interval
+        while not self._stop.is_set():
+            self.poll_once()
+            if now().timestamp() >= next_flush:
+                self.flush()
+                next_flush = now().timestamp() + self.flush_interval
+            self._stop.wait(self.interval)
+        self.flush(blocking=True)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.run, name="StreamPoller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+@click.command()
+@click.option("--interval", default=5.0, help="seconds between polls")
+@click.option("--flush_interval", default=300.0, help="seconds between partition writes")
+@click.option("--ticks/--no-ticks", default=False, help="also poll matched ticks")
+@click.option("--dry_run", is_flag=True, default=False)
+def main(interval: float, flush_interval: float, ticks: bool, dry_run: bool):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    poller = StreamPoller(
+        default_targets(), interval=interval, flush_interval=flush_interval, with_ticks=ticks, dry_run=dry_run,
+        instruments=default_instruments(),
+    )
+    poller.subscribe(lambda symbol, kind, rows: logger.info("%s %s: %d row(s), last %s", symbol, kind, len(rows), rows[-1]))
+    try:
+        poller.run()
+    except KeyboardInterrupt:
+        poller.flush(blocking=True)
+
+
+if __name__ == "__main__":
+    main()
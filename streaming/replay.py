@@ -0,0 +1,209 @@
+"""
+Market replay over the stored minute bars.
+
+Several symbols are replayed in timestamp order as one event stream, batch by
+batch, either as fast as possible or paced against the wall clock (`speed=1`
+is real time, `speed=60` plays an hour a minute).
+
+The merge is a k-way merge with `heapq` over one iterator of trading dates per
+symbol: each step takes the earliest pending date, loads that day for every
+symbol that has it, and merges those few hundred bars with one stable sort, so
+at most one day per symbol is in memory whatever the range (two with
+`prefetch`, which loads the next day on a worker thread while the current one
+is being consumed). Bars of the same minute come out in `symbols` order.
+
+    python streaming/replay.py --root data --symbol VN30 --symbol VN30F --start 2025-01-01 --speed 0
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Iterator
+
+import click
+import numpy as np
+import polars as pl
+
+from datasource.base import DataSource
+from streaming.ring_buffer import BAR_DTYPE
+
+__all__ = ["EVENT_DTYPE", "MarketReplay", "ReplayStats"]
+
+# a bar plus the symbol it was requested under (VN30F, not the contract code)
+EVENT_DTYPE = np.dtype(BAR_DTYPE.descr[:1] + [("symbol", "U16")] + BAR_DTYPE.descr[1:])
+MAX_IDLE_SECONDS = 60.0
+
+
+@dataclass
+class ReplayStats:
+    events: int = 0
+    batches: int = 0
+    days: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def events_per_s(self) -> float:
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+
+class MarketReplay:
+    def __init__(
+        self,
+        source: DataSource,
+        symbols: list[str],
+        start: date | None = None,
+        end: date | None = None,
+        batch_size: int = 1,
+        speed: float | None = None,
+        max_idle: float | None = MAX_IDLE_SECONDS,
+        prefetch: bool = True,
+    ):
+        """
+        speed       None (or 0) replays as fast as possible; otherwise simulated seconds per wall second
+        max_idle    paced modes shorten any quiet stretch (nights, lunch) to this many simulated seconds
+        """
+        self.source = source
+        self.symbols = symbols
+        self.start = start
+        self.end = end
+        self.batch_size = batch_size
+        self.speed = speed or None
+        self.max_idle = max_idle
+        self.prefetch = prefetch
+        self.stats = ReplayStats()
+
+    # --- merge ---------------------------------------------------------------
+    def _sessions(self) -> Iterator[tuple[date, list[int]]]:
+        """(trading date, indices of the symbols that traded it), in date order."""
+        heap = []
+        for i, symbol in enumerate(self.symbols):
+            dates = iter(self.source.trading_dates(symbol, self.start, self.end))
+            first = next(dates, None)
+            if first is not None:
+                heap.append((first, i, dates))
+        heapq.heapify(heap)
+        while heap:
+            d = heap[0][0]
+            members = []
+            while heap and heap[0][0] == d:
+                _, i, dates = heapq.heappop(heap)
+                members.append(i)
+                following = next(dates, None)
+                if following is not None:
+                    heapq.heappush(heap, (following, i, dates))
+            yield d, sorted(members)
+
+    def _day_events(self, symbol: str, d: date) -> np.ndarray:
+        df = self.source.load(symbol, d).select(
+            pl.col("t").dt.replace_time_zone(None),     # naive Asia/Ho_Chi_Minh wall clock, as in the ring buffer
+            *[pl.col(f).cast(pl.Float64) for f in ("o", "h", "l", "c")],
+            pl.col("v").cast(pl.Int64),
+        )
+        events = np.empty(len(df), dtype=EVENT_DTYPE)
+        events["symbol"] = symbol
+        for name in df.columns:
+            events[name] = df[name].to_numpy()
+        return events
+
+    def _merge_session(self, d: date, members: list[int]) -> np.ndarray:
+        merged = np.concatenate([self._day_events(self.symbols[i], d) for i in members])
+        # stable, so equal timestamps keep `symbols` order
+        return merged[np.argsort(merged["t"], kind="stable")]
+
+    def _merged_days(self) -> Iterator[np.ndarray]:
+        if not self.prefetch:
+            for session in self._sessions():
+                yield self._merge_session(*session)
+            return
+        # the worker hands back plain NumPy arrays, no Polars frame crosses threads
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = None
+            for session in self._sessions():
+                upcoming = pool.submit(self._merge_session, *session)
+                if pending is not None:
+                    yield pending.result()
+                pending = upcoming
+            if pending is not None:
+                yield pending.result()
+
+    # --- pacing --------------------------------------------------------------
+    def _pace(self, batch: np.ndarray) -> None:
+        t = batch["t"]
+        if self._prev_t is None:
+            self._prev_t = t[0]
+            self._wall0 = time.perf_counter()
+        steps = np.diff(t, prepend=self._prev_t).astype("timedelta64[ns]").astype(np.float64) / 1e9
+        if self.max_idle is not None:
+            steps = np.minimum(steps, self.max_idle)
+        self._sim_elapsed += steps.sum()
+        self._prev_t = t[-1]
+        delay = self._wall0 + self._sim_elapsed / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    # --- public --------------------------------------------------------------
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """Batches of `EVENT_DTYPE` rows, `batch_size` each except the last."""
+        self.stats = ReplayStats()
+        self._prev_t, self._wall0, self._sim_elapsed = None, 0.0, 0.0
+        started = time.perf_counter()
+        carry = np.empty(0, dtype=EVENT_DTYPE)
+        try:
+            for merged in self._merged_days():
+                self.stats.days += 1
+                pending = np.concatenate([carry, merged]) if len(carry) else merged
+                cut = len(pending) - len(pending) % self.batch_size
+                for lo in range(0, cut, self.batch_size):
+                    yield self._emit(pending[lo:lo + self.batch_size])
+                carry = pending[cut:]
+            if len(carry):
+                yield self._emit(carry)
+        finally:
+            self.stats.elapsed = time.perf_counter() - started
+
+    def _emit(self, batch: np.ndarray) -> np.ndarray:
+        if self.speed is not None:
+            self._pace(batch)
+        self.stats.events += len(batch)
+        self.stats.batches += 1
+        return batch
+
+    def run(self, callback: Callable[[np.ndarray], None]) -> ReplayStats:
+        """Feed every batch to `callback`; blocking."""
+        for batch in self:
+            callback(batch)
+        return self.stats
+
+
+@click.command()
+@click.option("--root", default="./data", help="Parquet lake root")
+@click.option("--symbol", "symbols", multiple=True, default=("VN30", "VN30F"))
+@click.option("--start", default=None, type=click.DateTime(["%Y-%m-%d"]))
+@click.option("--end", default=None, type=click.DateTime(["%Y-%m-%d"]))
+@click.option("--batch_size", default=1, type=int)
+@click.option("--speed", default=0.0, help="simulated seconds per wall second; 1 = real time, 0 = as fast as possible")
+@click.option("--prefetch/--no-prefetch", default=True)
+def main(root: str, symbols: tuple[str, ...], start, end, batch_size: int, speed: float, prefetch: bool):
+    from datasource.factory import datasource_builder
+
+    replay = MarketReplay(
+        datasource_builder(root, use_cache=False),
+        list(symbols),
+        start=start and start.date(),
+        end=end and end.date(),
+        batch_size=batch_size,
+        speed=speed,
+        prefetch=prefetch,
+    )
+    last = {}
+    stats = replay.run(lambda batch: last.update(t=batch["t"][-1]))
+    print(f"{stats.events:,} events in {stats.batches:,} batches over {stats.days} days, last {last.get('t')}: "
+          f"{stats.elapsed:.2f}s → {stats.events_per_s:,.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Fixed-size, array-backed ring buffer for the streaming mode.
+
+Rows live in one preallocated NumPy structured array; appending never
+allocates, and readers get an ordered copy of the last `n` rows.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+__all__ = ["BAR_DTYPE", "TICK_DTYPE", "RingBuffer"]
+
+# t is the naive Asia/Ho_Chi_Minh wall clock, same convention as datasource.panel
+BAR_DTYPE = np.dtype([
+    ("t", "datetime64[ns]"),
+    ("o", "f8"),
+    ("h", "f8"),
+    ("l", "f8"),
+    ("c", "f8"),
+    ("v", "i8"),
+])
+
+TICK_DTYPE = np.dtype([
+    ("t", "datetime64[ns]"),
+    ("price", "f8"),
+    ("volume", "i8"),
+])
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, dtype: np.dtype = BAR_DTYPE):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._count = 0         # total rows ever written; next slot is _count % capacity
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def last_t(self) -> np.datetime64 | None:
+        if self._count == 0:
+            return None
+        return self._data["t"][(self._count - 1) % self.capacity]
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append rows (a structured array of this buffer's dtype), overwriting the oldest ones."""
+        with self._lock:
+            if len(rows) >= self.capacity:
+                rows = rows[-self.capacity:]
+            start = self._count % self.capacity
+            first = min(len(rows), self.capacity - start)
+            self._data[start:start + first] = rows[:first]
+            self._data[:len(rows) - first] = rows[first:]
+            self._count += len(rows)
+
+    def replace_last(self, row: np.ndarray) -> None:
+        """Overwrite the newest row in place, e.g. with a refreshed version of a still-open bar."""
+        with self._lock:
+            if self._count == 0:
+                raise IndexError("replace_last on an empty RingBuffer")
+            self._data[(self._count - 1) % self.capacity] = row
+
+    def snapshot(self, n: int | None = None) -> np.ndarray:
+        """Ordered copy (oldest first) of the last `n` rows, all buffered rows by default."""
+        with self._lock:
+            size = len(self)
+            n = size if n is None else min(n, size)
+            end = self._count % self.capacity
+            idx = (np.arange(end - n, end)) % self.capacity
+            return self._data[idx]
@@ -0,0 +1,69 @@
+"""
+Tick deduplication of the streaming poller against a stubbed matching endpoint: `truncTime` only
+has one-second resolution, so matches arriving within the last second seen must still be taken.
+Runs under pytest or as a script:
+
+    PYTHONPATH=. python testing/test_poller.py
+"""
+from datetime import datetime
+
+import pandas as pd
+
+from streaming.poller import StreamPoller
+
+TZ = "Asia/Ho_Chi_Minh"
+SYMBOL = "VN30F2511"
+T = datetime(2025, 11, 3, 9, 15, 0)
+
+
+class StubService:
+    """Hands out one prepared `get_matching` response per poll; no bars."""
+
+    def __init__(self, responses: list[list[tuple[int, float, int]]]):
+        self.responses = iter(responses)
+
+    def get_candle(self, **kwargs):
+        return None
+
+    def get_matching(self, symbol: str, limit: int, **kwargs) -> pd.DataFrame:
+        ticks = next(self.responses)      # (second after T, price, volume), newest last
+        return pd.DataFrame({
+            "truncTime": pd.to_datetime([T + pd.Timedelta(seconds=s) for s, _, _ in ticks]).tz_localize(TZ),
+            "matchPrice": [p for _, p, _ in ticks],
+            "matchVol": [v for _, _, v in ticks],
+        })
+
+
+def polled_volumes(responses: list[list[tuple[int, float, int]]]) -> list[int]:
+    poller = StreamPoller({SYMBOL: "data/VN30F"}, with_ticks=True, stock_service=StubService(responses))
+    for _ in responses:
+        poller.poll_once()
+    return poller.ticks[SYMBOL].snapshot()["volume"].tolist()
+
+
+def test_matches_within_the_last_second_seen():
+    # match 3 arrives after the first poll but within the same second as match 2
+    assert polled_volumes([
+        [(0, 1300.0, 1), (0, 1300.1, 2)],
+        [(0, 1300.0, 1), (0, 1300.1, 2), (0, 1300.2, 3), (1, 1300.3, 4)],
+    ]) == [1, 2, 3, 4]
+
+
+def test_identical_matches_within_one_second():
+    assert polled_volumes([
+        [(0, 1300.0, 5)],
+        [(0, 1300.0, 5), (0, 1300.0, 5)],
+        [(0, 1300.0, 5), (0, 1300.0, 5), (1, 1300.0, 5)],
+    ]) == [5, 5, 5]
+
+
+def test_repeated_and_stale_responses_add_nothing():
+    first = [(0, 1300.0, 1), (1, 1300.1, 2)]
+    assert polled_volumes([first, first, [(0, 1300.0, 1)], first + [(1, 1300.2, 3)]]) == [1, 2, 3]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"ok {name}")
@@ -0,0 +1,74 @@
+"""
+Round trip of the storage profile: whatever `write_storage` stores, `read_storage` must give back
+the same frame. Runs under pytest or as a script:
+
+    PYTHONPATH=. python testing/test_storage_profile.py
+"""
+import math
+import os
+import tempfile
+from datetime import datetime
+from glob import glob
+
+import polars as pl
+
+from datasource.storage_profile import read_storage, write_storage
+
+TZ = "Asia/Ho_Chi_Minh"
+
+
+def round_trip(df: pl.DataFrame) -> pl.DataFrame:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/stock_date=2025-01-02/0.parquet"
+        write_storage(df, path)
+        return read_storage(path)
+
+
+def bars(prices: list[float]) -> pl.DataFrame:
+    return pl.DataFrame({
+        "symbol": ["VN30"] * len(prices),
+        "c": prices,
+        "t": pl.datetime_range(datetime(2025, 1, 2, 9), datetime(2025, 1, 2, 9, len(prices) - 1), "1m", time_zone=TZ, eager=True),
+    }).with_columns(pl.col("t").dt.cast_time_unit("ns"))
+
+
+def assert_same_prices(prices: list[float]) -> None:
+    out = round_trip(bars(prices))["c"].to_list()
+    assert len(out) == len(prices)
+    for expected, got in zip(prices, out):
+        assert (expected is None and got is None) or (math.isnan(expected) and math.isnan(got)) or expected == got, (expected, got)
+
+
+def test_prices_round_trip():
+    # 1137.11 is 1137.1099.. in binary: a Float -> Decimal cast truncated it to 1137.10
+    assert_same_prices([1137.11, 1137.1, 1250.0, 0.01, 1e-4, -3.25, 0.0])
+    assert_same_prices([1137.11, None, 1138.2])
+    assert_same_prices([1.5, float("nan")])
+    assert_same_prices([1 / 3, 2 / 3])                     # no exact tick: stays float
+
+
+def test_large_values_round_trip():
+    # whole values from 1e16 print as "1e16" and used to fail the string -> Decimal cast
+    assert_same_prices([1e16, 2e16])
+    assert_same_prices([99999999999999990.0])
+    # beyond 2**53 ticks are not exact in a double: 1e15 + 0.5 came back as 1000000000000000.4
+    assert_same_prices([1e15 + 0.5, 1.0])
+    assert_same_prices([2.0 ** 53, 2.0 ** 53 - 1])
+    assert_same_prices([123456789012.3456])
+
+
+def test_lake_round_trip(root: str = os.environ.get("LAKE_ROOT", "data")):
+    files = sorted(glob(f"{root}/**/stock_date=*/*.parquet", recursive=True))
+    for f in files:
+        df = read_storage(f)
+        expected = df.drop("stock_date", strict=False).sort("t")
+        got = round_trip(df)
+        assert got.schema == expected.schema, f
+        assert got.equals(expected), f
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"ok {name}")
@@ -0,0 +1,72 @@
+"""
+Startup budget for the command-line entry points.
+
+Each module is imported in a fresh interpreter under `python -X importtime`, and
+its cumulative import time is checked against IMPORT_BUDGET_MS. The wall time
+of `<script> --help` is checked against HELP_BUDGET_MS. The command exits with
+status 1 when anything is over budget. Medians over `--runs` runs.
+
+    PYTHONPATH=. python utils/startup_bench.py
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import click
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# module -> ms to import it (cumulative, as reported by -X importtime)
+IMPORT_BUDGET_MS = {
+    "jobs.tasks.update_stock_price_5m": 150,    # was ~470 ms with pandas/polars/httpx at import
+    "jobs.schedule_5m": 50,
+    "helper.update_git": 30,
+}
+# script -> ms of wall time for `--help`, interpreter start-up included
+HELP_BUDGET_MS = {
+    "jobs/tasks/update_stock_price_5m.py": 200,  # was ~580 ms
+}
+
+
+def _env() -> dict:
+    return dict(os.environ, PYTHONPATH=str(ROOT))
+
+
+def import_ms(module: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=_env(), cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    # "import time: <self us> | <cumulative us> | <name>"; the module itself is the unindented entry
+    match = re.search(rf"^import time:\s+\d+ \|\s+(\d+) \| {re.escape(module)}$", out, re.MULTILINE)
+    return int(match.group(1)) / 1e3
+
+
+def help_ms(script: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script, "--help"], env=_env(), cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1e3
+
+
+@click.command()
+@click.option("--runs", default=5, help="runs per measurement")
+def main(runs: int):
+    over = []
+    checks = [(f"import {m}", lambda m=m: import_ms(m), b) for m, b in IMPORT_BUDGET_MS.items()]
+    checks += [(f"{s} --help", lambda s=s: help_ms(s), b) for s, b in HELP_BUDGET_MS.items()]
+    for name, measure, budget in checks:
+        ms = statistics.median(measure() for _ in range(runs))
+        status = "ok" if ms <= budget else "OVER"
+        print(f"{status:4s} {name}: {ms:7.1f} ms (budget {budget} ms)")
+        if ms > budget:
+            over.append(name)
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()